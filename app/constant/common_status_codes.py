@@ -6,3 +6,4 @@ NOT_FOUND = status.HTTP_404_NOT_FOUND, 404, "NOT_FOUND", "The requested resource
 FORBIDDEN = status.HTTP_403_FORBIDDEN, 403, "FORBIDDEN", "You do not have permission to access this resource."
 ERROR_INTERNAL_SERVER_ERROR = status.HTTP_500_INTERNAL_SERVER_ERROR, 500, "ERROR_INTERNAL_SERVER_ERROR", "An unexpected error occurred."
 UNAUTHORIZED = status.HTTP_401_UNAUTHORIZED, 401, "UNAUTHORIZED", "Authentication is required to access this resource."
+TOO_MANY_REQUESTS = status.HTTP_429_TOO_MANY_REQUESTS, 429, "TOO_MANY_REQUESTS", "Too many requests. Please try again later."
@@ -12,6 +12,7 @@ class AppStatus(Enum):
     FORBIDDEN = common.FORBIDDEN
     ERROR_INTERNAL_SERVER_ERROR = common.ERROR_INTERNAL_SERVER_ERROR
     UNAUTHORIZED = common.UNAUTHORIZED
+    TOO_MANY_REQUESTS = common.TOO_MANY_REQUESTS
 
     # user
     LOGIN_SUCCESS = user.LOGIN_SUCCESS
@@ -0,0 +1,175 @@
+"""
+Kafka payload codecs.
+
+Producers encode with the codec configured for the topic (KAFKA_TOPIC_CODECS,
+else KAFKA_DEFAULT_CODEC) and tag every record with a content-type header.
+Consumers decode by that header, so producers using different codecs can share
+a topic; records without the header fall back to the topic's codec.
+
+Codec specs: "json", "orjson", "msgpack", "protobuf:<full message name>"
+(e.g. "protobuf:edge.kafka.DeviceTelemetry"). The protobuf codec encodes a
+message instance (or a dict of its fields) and decodes to a message instance.
+orjson and msgpack come with the "kafka-codecs" extra; configuring one that is
+not installed fails at startup rather than silently changing the wire format.
+"""
+import json
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from google.protobuf import descriptor_pool, message_factory
+
+from app.core.setting import settings
+
+try:
+    import orjson
+except ImportError:  # optional faster JSON backend (kafka-codecs extra)
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional binary backend (kafka-codecs extra)
+    msgpack = None
+
+CONTENT_TYPE_HEADER = "content-type"
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+PROTOBUF = "application/x-protobuf"
+
+
+class Codec:
+    name: str
+    content_type: str
+
+    def encode(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+class JsonCodec(Codec):
+    name = "json"
+    content_type = JSON
+
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(value).encode("utf-8")
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(Codec):
+    """Same wire format as JsonCodec, so either side can be swapped independently."""
+    name = "orjson"
+    content_type = JSON
+
+    def encode(self, value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    def decode(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackCodec(Codec):
+    name = "msgpack"
+    content_type = MSGPACK
+
+    def encode(self, value: Any) -> bytes:
+        return msgpack.packb(value)
+
+    def decode(self, data: bytes) -> Any:
+        return msgpack.unpackb(data)
+
+
+class ProtobufCodec(Codec):
+    name = "protobuf"
+
+    def __init__(self, message_cls):
+        self.message_cls = message_cls
+        self.content_type = f"{PROTOBUF}; messageType={message_cls.DESCRIPTOR.full_name}"
+
+    def encode(self, value: Any) -> bytes:
+        if isinstance(value, dict):
+            value = self.message_cls(**value)
+        return value.SerializeToString()
+
+    def decode(self, data: bytes) -> Any:
+        return self.message_cls.FromString(data)
+
+
+def _protobuf_message(full_name: str):
+    # Importing the package registers the generated messages in the default pool
+    import app.core.kafka.proto  # noqa: F401
+
+    try:
+        descriptor = descriptor_pool.Default().FindMessageTypeByName(full_name)
+    except KeyError:
+        raise ValueError(f"Unknown protobuf message type {full_name!r}")
+    return message_factory.GetMessageClass(descriptor)
+
+
+def _require(name: str, module):
+    if module is None:
+        raise RuntimeError(f"Kafka codec {name} is not installed: poetry install --extras kafka-codecs "
+                           f"(or pip install {name})")
+
+
+@lru_cache(maxsize=None)
+def get_codec(spec: str) -> Codec:
+    """Return the codec for a spec; raises if it is unknown or its library is not installed."""
+    name, _, message_type = spec.partition(":")
+    if name == "json":
+        return JsonCodec()
+    if name == "orjson":
+        _require(name, orjson)
+        return OrjsonCodec()
+    if name == "msgpack":
+        _require(name, msgpack)
+        return MsgpackCodec()
+    if name == "protobuf" and message_type:
+        return ProtobufCodec(_protobuf_message(message_type))
+    raise ValueError(f"Unknown Kafka codec {spec!r}")
+
+
+@lru_cache(maxsize=256)
+def codec_for_content_type(content_type: str) -> Optional[Codec]:
+    """
+    Codec able to decode a record tagged with content_type, or None if unsupported.
+    Raises if the codec is known but its library is not installed here.
+    """
+    media_type, _, params = content_type.partition(";")
+    media_type = media_type.strip().lower()
+    if media_type == JSON:
+        return get_codec("orjson" if orjson is not None else "json")
+    if media_type == MSGPACK:
+        return get_codec("msgpack")
+    if media_type == PROTOBUF:
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "messagetype" and value.strip():
+                try:
+                    return get_codec(f"protobuf:{value.strip()}")
+                except ValueError:
+                    return None
+    return None
+
+
+class TopicCodecs:
+    """Per-topic codec selection: topic -> spec, with a default for unlisted topics."""
+
+    def __init__(self, default: str = settings.KAFKA_DEFAULT_CODEC,
+                 topics: Optional[Dict[str, str]] = None):
+        self.default = get_codec(default)
+        self.topics = {topic: get_codec(spec)
+                       for topic, spec in (settings.KAFKA_TOPIC_CODECS if topics is None else topics).items()}
+
+    def for_topic(self, topic: str) -> Codec:
+        return self.topics.get(topic, self.default)
+
+    def for_record(self, topic: str, headers) -> Optional[Codec]:
+        """Decoder for a consumed record: its content-type header, else the topic's codec."""
+        for name, value in headers or ():
+            if name == CONTENT_TYPE_HEADER:
+                return codec_for_content_type(value.decode("latin-1"))
+        return self.for_topic(topic)
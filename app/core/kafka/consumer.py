@@ -1,10 +1,85 @@
 # app/core/kafka/consumer_service.py
 import asyncio
-import json
+import base64
 import logging
 import time
+import zlib
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
-from aiokafka import AIOKafkaConsumer
+from aiokafka import AIOKafkaConsumer, ConsumerRebalanceListener, TopicPartition
+
+from app.core.kafka.codecs import TopicCodecs
+from app.core.kafka.outbox import add_outbox_event, outbox_relay
+from app.core.metrics import registry
+from app.core.setting import settings
+from app.initialize import database
+from app.utils.cache import TTLCache
+
+EVENT_ID_HEADER = "event_id"
+
+# Payload field (or protobuf message field) naming the event type, e.g. {"event": "user_created", ...}
+EVENT_FIELD = "event"
+
+MessageHandler = Callable[[Any], Awaitable[None]]
+
+# How long a revoke waits for running handlers of the revoked partitions
+REVOKE_DRAIN_TIMEOUT = 10.0
+
+consumer_messages = registry.counter(
+    "kafka_consumer_messages_total", "Kafka messages handled by outcome", ("topic", "outcome")
+)
+
+
+class _OffsetTracker:
+    """
+    Offsets of one partition in fetch order. Messages finish out of order across
+    lanes; the committable position only advances over a contiguous prefix of
+    finished offsets, so a commit never skips a message that is still running.
+    """
+
+    def __init__(self):
+        self.in_flight: deque = deque()
+        self.finished: set = set()
+        self.committable: Optional[int] = None
+        # Handlers of this partition currently running; queued records are skipped once revoked
+        self.running = 0
+        self.revoked = False
+
+    def add(self, offset: int):
+        self.in_flight.append(offset)
+
+    def finish(self, offset: int):
+        if not self.in_flight or offset < self.in_flight[0]:
+            return
+        self.finished.add(offset)
+        while self.in_flight and self.in_flight[0] in self.finished:
+            done = self.in_flight.popleft()
+            self.finished.discard(done)
+            self.committable = done + 1
+
+
+class _RebalanceListener(ConsumerRebalanceListener):
+    def __init__(self, owner: "KafkaConsumer"):
+        self.owner = owner
+
+    async def on_partitions_revoked(self, revoked):
+        # Stop handling records still queued for these partitions: the next owner re-fetches
+        # them from the committed offset, and a key must not run on two members at once
+        trackers = [self.owner.trackers[tp] for tp in revoked if tp in self.owner.trackers]
+        for tracker in trackers:
+            tracker.revoked = True
+        deadline = time.monotonic() + REVOKE_DRAIN_TIMEOUT
+        while any(tracker.running for tracker in trackers) and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+
+        # Last chance to commit what this member finished before another member takes over
+        await self.owner.commit()
+        for tp in revoked:
+            self.owner.trackers.pop(tp, None)
+
+    async def on_partitions_assigned(self, assigned):
+        pass
 
 
 class KafkaConsumer:
@@ -15,74 +90,337 @@ class KafkaConsumer:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self, brokers: str = "localhost:9096", topic: str = "demo"):
+    def __init__(self, brokers: str = settings.KAFKA_BROKERS,
+                 group_id: Optional[str] = settings.KAFKA_CONSUMER_GROUP_ID,
+                 workers: int = settings.KAFKA_CONSUMER_WORKERS,
+                 max_records: int = settings.KAFKA_CONSUMER_MAX_RECORDS,
+                 lane_queue_size: int = settings.KAFKA_CONSUMER_LANE_QUEUE_SIZE,
+                 commit_interval: float = settings.KAFKA_CONSUMER_COMMIT_INTERVAL_MS / 1000,
+                 max_retries: int = settings.KAFKA_CONSUMER_MAX_RETRIES,
+                 dead_letter_suffix: str = settings.KAFKA_CONSUMER_DEAD_LETTER_SUFFIX,
+                 codecs: Optional[TopicCodecs] = None):
         self.brokers = brokers
-        self.topic = topic
-        # self.group_id = group_id
+        # Consumers sharing a group_id split the partitions between them; None = no group, no commits
+        self.group_id = group_id or None
+        self.workers = max(workers, 1)
+        self.max_records = max_records
+        self.lane_queue_size = lane_queue_size
+        self.commit_interval = commit_interval
+        self.max_retries = max_retries
+        # Records that cannot be handled go to <topic><suffix> before their offset is committed
+        self.dead_letter_suffix = dead_letter_suffix
+        # Records are decoded by their content-type header, else the topic's codec
+        self.codecs = codecs or TopicCodecs()
         self.consumer: AIOKafkaConsumer | None = None
         self.running = False
         self.task: asyncio.Task | None = None
 
-        # Callback (service khác sẽ override)
-        self.on_message_callback = None
+        self.lanes: List[asyncio.Queue] = []
+        self.trackers: Dict[TopicPartition, _OffsetTracker] = {}
+        self._committed: Dict[TopicPartition, int] = {}
+        self._tasks: List[asyncio.Task] = []
+        # Outbox events are delivered at least once: skip event_ids handled recently
+        self._seen_events = TTLCache(maxsize=100_000, ttl=3600)
+
+        # Handler đăng ký theo (topic, event); event None = mọi event của topic
+        self.handlers: Dict[str, Dict[Optional[str], List[MessageHandler]]] = {}
+        # Precomputed (topic, event) -> handlers, rebuilt whenever a handler is registered
+        self._dispatch: Dict[Tuple[str, Optional[str]], Tuple[MessageHandler, ...]] = {}
 
     async def start(self):
         if self.running:
             return
 
-        logging.info(f"Starting global Kafka consumer on topic '{self.topic}'")
+        if not self.handlers:
+            logging.info("Kafka consumer has no handlers registered; not starting")
+            return
+
+        logging.info(f"Starting global Kafka consumer on topics {sorted(self.handlers)} (group {self.group_id})")
 
         self.consumer = AIOKafkaConsumer(
-            self.topic,
             bootstrap_servers=self.brokers,
-            # group_id=self.group_id,
-            auto_offset_reset="latest",
-            enable_auto_commit=True,
-            value_deserializer=lambda v: json.loads(v.decode("utf-8"))
+            group_id=self.group_id,
+            auto_offset_reset=settings.KAFKA_CONSUMER_AUTO_OFFSET_RESET,
+            enable_auto_commit=False,
         )
-
-        await self.consumer.start()
+        try:
+            await self.consumer.start()
+            self._subscribe()
+        except Exception:
+            await self.consumer.stop()
+            raise
         self.running = True
 
+        # One lane per worker; a message always goes to the lane of its key, which keeps per-key order
+        self.lanes = [asyncio.Queue(maxsize=self.lane_queue_size) for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self._lane_worker(lane)) for lane in self.lanes]
+        self._tasks.append(asyncio.create_task(self._commit_loop()))
+
         # Create background task
         self.task = asyncio.create_task(self._consume_loop())
 
         logging.info("Kafka consumer started.")
 
+    def start_in_background(self, retry_max: float = 30.0):
+        """Start without holding up app startup, retrying with backoff while the broker is unreachable."""
+        self.task = asyncio.create_task(self._start_with_retry(retry_max))
+
+    async def _start_with_retry(self, retry_max: float):
+        delay = 0.5
+        while not self.running and self.handlers:
+            try:
+                await self.start()
+            except Exception as e:
+                logging.warning(f"Kafka consumer could not start ({e!r}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, retry_max)
+
     async def stop(self):
-        self.running = False
+        was_running, self.running = self.running, False
 
         if self.task:
             self.task.cancel()
 
+        if was_running:
+            # Let the lanes finish what was already fetched, then commit it
+            try:
+                await asyncio.wait_for(asyncio.gather(*(lane.join() for lane in self.lanes)), timeout=5)
+            except asyncio.TimeoutError:
+                logging.warning("Kafka consumer stopped with messages still in flight")
+            await self.commit()
+            for task in self._tasks:
+                task.cancel()
+
         if self.consumer:
             await self.consumer.stop()
             logging.info("Kafka consumer stopped.")
 
     async def _consume_loop(self):
         try:
-            async for msg in self.consumer:
-                # logging.info(
-                #     f"[KAFKA] partition={msg.partition} offset={msg.offset} value={msg.value}"
-                # )
-                # Trigger callback nếu có
-                if self.on_message_callback:
-                    try:
-                        await self.on_message_callback(msg.value)
-                    except Exception as e:
-                        logging.error(f"Consumer callback error: {e}")
+            while self.running:
+                batches = await self.consumer.getmany(timeout_ms=settings.KAFKA_CONSUMER_POLL_TIMEOUT_MS,
+                                                      max_records=self.max_records)
+                assignment = self.consumer.assignment()
+                for tp, messages in batches.items():
+                    if tp not in assignment:
+                        continue
+                    tracker = self.trackers.get(tp)
+                    if tracker is None:
+                        tracker = self.trackers[tp] = _OffsetTracker()
+                    for msg in messages:
+                        tracker.add(msg.offset)
+                        # Blocks when the lane is full, which pauses fetching (bounded memory)
+                        await self.lanes[self._lane_of(msg)].put((tracker, msg))
 
         except asyncio.CancelledError:
             pass
+        except Exception as e:
+            logging.error(f"Kafka consume loop failed: {e}", exc_info=True)
+
+    def _subscribe(self):
+        self.consumer.subscribe(sorted(self.handlers), listener=_RebalanceListener(self) if self.group_id else None)
 
-    # Cho phép service khác đăng ký callback
-    def on_message(self, func):
+    def _lane_of(self, msg) -> int:
+        key = msg.key if msg.key is not None else f"{msg.topic}:{msg.partition}".encode()
+        return zlib.crc32(key) % len(self.lanes)
+
+    async def _lane_worker(self, lane: asyncio.Queue):
+        while True:
+            tracker, msg = await lane.get()
+            try:
+                if tracker.revoked:
+                    continue
+                tracker.running += 1
+                try:
+                    try:
+                        error = await self._handle(msg)
+                    except Exception as e:
+                        # One bad record must not take the lane (and its partitions' commits) down
+                        logging.error(f"Kafka message at {msg.topic}[{msg.partition}]@{msg.offset} failed: {e}",
+                                      exc_info=True)
+                        consumer_messages.labels(msg.topic, "failed").inc()
+                        error = repr(e)
+                    if error is not None:
+                        # The offset is only finished (and so committed) once the record is parked durably
+                        await self._dead_letter(msg, error)
+                finally:
+                    tracker.running -= 1
+                tracker.finish(msg.offset)
+            finally:
+                lane.task_done()
+
+    async def _handle(self, msg) -> Optional[str]:
+        """Handle one record; returns why it could not be handled, or None."""
+        event_id = next((value for name, value in msg.headers or () if name == EVENT_ID_HEADER), None)
+        if event_id is not None and self._seen_events.get(event_id):
+            consumer_messages.labels(msg.topic, "duplicate").inc()
+            return None
+
+        try:
+            codec = self.codecs.for_record(msg.topic, msg.headers)
+            if codec is None:
+                raise ValueError("unsupported content-type")
+            value = codec.decode(msg.value)
+        except Exception as e:
+            # Retrying cannot fix a payload that does not decode
+            logging.error(f"Undecodable Kafka message at {msg.topic}[{msg.partition}]@{msg.offset}: {e}")
+            consumer_messages.labels(msg.topic, "undecodable").inc()
+            return f"undecodable: {e}"
+
+        event = value.get(EVENT_FIELD) if isinstance(value, dict) else getattr(value, EVENT_FIELD, None)
+        if not isinstance(event, str):
+            event = None
+        handlers = self._dispatch.get((msg.topic, event))
+        if handlers is None:
+            handlers = self._dispatch.get((msg.topic, None), ())
+
+        failed = None
+        for handler in handlers:
+            # Retried per handler, so a failing handler does not re-run the ones that succeeded
+            for attempt in range(self.max_retries + 1):
+                try:
+                    await handler(value)
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        # Give up on this message so it does not block its partition's commits forever
+                        name = getattr(handler, '__qualname__', handler)
+                        logging.error(f"Consumer handler {name} error at {msg.topic}[{msg.partition}]@{msg.offset}, "
+                                      f"dead-lettered after {attempt + 1} attempts: {e}")
+                        failed = f"{name}: {e!r}"
+                        break
+                    await asyncio.sleep(min(0.1 * 2 ** attempt, 5.0))
+        if failed is not None:
+            consumer_messages.labels(msg.topic, "failed").inc()
+            return failed
+
+        if event_id is not None:
+            self._seen_events.set(event_id, True)
+        consumer_messages.labels(msg.topic, "ok").inc()
+        return None
+
+    async def _dead_letter(self, msg, error: str):
+        """
+        Stage the raw record in the outbox for <topic><dead_letter_suffix>, retrying
+        until the write commits: until then the offset stays uncommitted.
+        """
+        payload = {
+            "topic": msg.topic,
+            "partition": msg.partition,
+            "offset": msg.offset,
+            "key": base64.b64encode(msg.key).decode() if msg.key is not None else None,
+            "value": base64.b64encode(msg.value).decode() if msg.value is not None else None,
+            "headers": [[name, base64.b64encode(value).decode()] for name, value in msg.headers or ()],
+            "error": error,
+        }
+        key = msg.key.decode("utf-8", "replace") if msg.key is not None else None
+        delay = 0.5
+        while True:
+            try:
+                if database.AsyncSessionLocal is None:
+                    raise RuntimeError("database is not connected")
+                async with database.AsyncSessionLocal() as session:
+                    add_outbox_event(session, msg.topic + self.dead_letter_suffix, payload, key=key)
+                    await session.commit()
+                outbox_relay.notify()
+                consumer_messages.labels(msg.topic, "dead_lettered").inc()
+                return
+            except Exception as e:
+                logging.error(f"Could not dead-letter {msg.topic}[{msg.partition}]@{msg.offset} ({e}); "
+                              f"retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    async def _commit_loop(self):
+        while True:
+            await asyncio.sleep(self.commit_interval)
+            try:
+                await self.commit()
+            except Exception as e:
+                logging.warning(f"Kafka offset commit failed: {e}")
+
+    async def commit(self):
+        """Commit, per partition, the offset after the last contiguous processed message."""
+        if not self.group_id or self.consumer is None:
+            return
+        offsets = {tp: t.committable for tp, t in self.trackers.items()
+                   if t.committable is not None and t.committable != self._committed.get(tp)}
+        if offsets:
+            await self.consumer.commit(offsets)
+            self._committed.update(offsets)
+
+    def collect_lag(self):
+        """Per assigned partition: high watermark minus the next offset still to be processed."""
+        if not self.running or self.consumer is None:
+            return []
+        samples = []
+        for tp in self.consumer.assignment():
+            highwater = self.consumer.highwater(tp)
+            if highwater is None:
+                continue
+            tracker = self.trackers.get(tp)
+            if tracker is not None and tracker.in_flight:
+                position = tracker.in_flight[0]
+            elif tracker is not None and tracker.committable is not None:
+                position = tracker.committable
+            else:
+                position = highwater
+            samples.append(((tp.topic, str(tp.partition)), max(highwater - position, 0)))
+        return samples
+
+    def collect_lane_depths(self):
+        return [((str(i),), lane.qsize()) for i, lane in enumerate(self.lanes)]
+
+    # Cho phép service khác đăng ký handler
+    def register(self, topic: str, handler: MessageHandler, event: Optional[str] = None):
+        """
+        Run handler for messages on topic whose payload "event" equals event
+        (every message on the topic when event is None). All topics share this one consumer.
+
+        Ví dụ:
+            consumer.register("demo", handle_user_created, event="user_created")
+        """
+        self.handlers.setdefault(topic, {}).setdefault(event, []).append(handler)
+        self._build_dispatch()
+        if self.running:
+            self._subscribe()
+
+    def handler(self, topic: str, event: Optional[str] = None):
+        """
+        Decorator form of register().
+
+        Ví dụ:
+            @kafka_consumer.handler("demo", event="user_created")
+            async def handle_user_created(data: dict): ...
+        """
+        def decorator(func: MessageHandler) -> MessageHandler:
+            self.register(topic, func, event)
+            return func
+        return decorator
+
+    def on_message(self, func, topic: str = settings.KAFKA_USER_EVENTS_TOPIC):
         """
         Ví dụ:
             consumer.on_message(handle_event)
         """
-        self.on_message_callback = func
+        self.register(topic, func)
+
+    def _build_dispatch(self):
+        # Event-specific handlers run together with the topic's catch-all handlers
+        dispatch = {}
+        for topic, by_event in self.handlers.items():
+            catch_all = tuple(by_event.get(None, ()))
+            dispatch[(topic, None)] = catch_all
+            for event, handlers in by_event.items():
+                if event is not None:
+                    dispatch[(topic, event)] = tuple(handlers) + catch_all
+        self._dispatch = dispatch
 
 
 # Singleton Instance
 kafka_consumer = KafkaConsumer()
+
+registry.callback("kafka_consumer_lag", "Messages not yet processed per assigned partition", "gauge",
+                  ("topic", "partition"), kafka_consumer.collect_lag)
+registry.callback("kafka_consumer_lane_depth", "Messages queued per consumer worker lane", "gauge",
+                  ("lane",), kafka_consumer.collect_lane_depths)
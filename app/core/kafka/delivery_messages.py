@@ -1,18 +1,22 @@
 import logging
+from app.core.kafka.consumer import KafkaConsumer
+from app.core.setting import settings
 from app.modules.user.factory import create_auth_service
 from app.modules.user.service import AuthService
 
 
 class KafkaDeliveryMessages:
-    def __init__(self):
-        self.auth_service: AuthService | None = None
+    def __init__(self, auth_service: AuthService):
+        self.auth_service = auth_service
 
-    async def init(self):
-        if self.auth_service is None:
-            self.auth_service = await create_auth_service()
+    @classmethod
+    async def create(cls) -> "KafkaDeliveryMessages":
+        """Build the services once at startup, not on every message."""
+        return cls(await create_auth_service())
 
-    async def handle(self, data: dict):
-        await self.init()
+    def register(self, consumer: KafkaConsumer):
+        consumer.register(settings.KAFKA_USER_EVENTS_TOPIC, self.handle)
 
+    async def handle(self, data: dict):
         logging.info(f"[DELIVERY] Received: {data}")
         await self.auth_service.receive_messages(data)
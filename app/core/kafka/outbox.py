@@ -0,0 +1,222 @@
+"""
+Durable outbox for Kafka events.
+
+Events are written to the local SQLite database in the same session (and so
+the same transaction) as the domain change that produced them, so an event
+exists if and only if its change was committed, whether or not Kafka is
+reachable at the time. OutboxRelay drains the table to Kafka in id order,
+in batches, backing off exponentially while the broker is unavailable, and
+deletes each event once the broker has acknowledged it.
+
+Only one relay publishes at a time, even with several uvicorn workers: each
+batch starts by taking or renewing a lease row in `kafka_outbox_lease`, and the
+other relays stand by until the lease is released or expires.
+
+Delivery is at-least-once: a crash between the broker's acknowledgement and
+the delete resends that batch on restart. Every record carries an `event_id`
+header so consumers can drop such repeats.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, Optional
+
+from sqlalchemy import Column, Float, Integer, String, Text, DateTime, delete, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from app.core.kafka.producer import KafkaProducer, kafka_producer
+from app.core.metrics import registry
+from app.core.setting import settings
+from app.initialize import database
+from app.modules.user.model import Base
+
+logger = logging.getLogger(__name__)
+
+EVENT_ID_HEADER = "event_id"
+RELAY_LEASE = "relay"
+
+outbox_published = registry.counter(
+    "kafka_outbox_published_total", "Outbox events acknowledged by Kafka"
+)
+outbox_publish_failures = registry.counter(
+    "kafka_outbox_publish_failures_total", "Outbox batches that failed to publish and will be retried"
+)
+
+
+class OutboxEvent(Base):
+    __tablename__ = "kafka_outbox"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    event_id = Column(String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
+    topic = Column(String(255), nullable=False)
+    key = Column(String(255), nullable=True)
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class OutboxLease(Base):
+    __tablename__ = "kafka_outbox_lease"
+
+    name = Column(String(64), primary_key=True)
+    owner = Column(String(255), nullable=False)
+    lease_until = Column(Float, nullable=False)
+
+
+def add_outbox_event(db: AsyncSession, topic: str, payload: Any, key: Optional[str] = None) -> str:
+    """Stage an event in the caller's session; it is committed (or rolled back) with the caller's changes."""
+    event = OutboxEvent(event_id=str(uuid.uuid4()), topic=topic, key=key, payload=json.dumps(payload))
+    db.add(event)
+    return event.event_id
+
+
+class OutboxRelay:
+    def __init__(self, producer: KafkaProducer, batch_size: int, poll_interval: float,
+                 retry_base: float, retry_max: float, lease_seconds: float = 60.0):
+        self.producer = producer
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        # Longer than a batch can take to publish, or a second relay could resend it
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._failures = 0
+        self._stopping = False
+
+    async def start(self):
+        """Start relaying in the background; never fails because Kafka is down."""
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 5.0):
+        """Let an in-flight batch finish (so it is not resent on restart), then stop."""
+        if not self._task:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            pass
+        await self._release_lease()
+
+    def notify(self):
+        """Wake the relay after committing events, instead of waiting for the next poll."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                # The producer instance is kept across outages: in-flight batches are retried under the same
+                # producer id and sequence numbers, which the broker deduplicates (idempotence)
+                if not self.producer.started:
+                    await self.producer.start()
+                drained = await self.relay_batch()
+                self._failures = 0
+                if drained == self.batch_size:
+                    continue
+                delay = self.poll_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failures += 1
+                outbox_publish_failures.inc()
+                delay = min(self.retry_base * 2 ** (self._failures - 1), self.retry_max)
+                logger.warning(f"Kafka outbox relay failed ({e!r}); retrying in {delay:.1f}s")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def relay_batch(self) -> int:
+        """Publish the oldest pending events; returns how many were acknowledged."""
+        if database.AsyncSessionLocal is None:
+            return 0
+
+        async with database.AsyncSessionLocal() as session:
+            if not await self._hold_lease(session):
+                return 0
+
+            result = await session.execute(select(OutboxEvent).order_by(OutboxEvent.id).limit(self.batch_size))
+            events = result.scalars().all()
+            if not events:
+                return 0
+
+            futures = [
+                await self.producer.publish(event.topic, json.loads(event.payload), key=event.key,
+                                            headers=[(EVENT_ID_HEADER, event.event_id.encode())])
+                for event in events
+            ]
+            results = await asyncio.gather(*futures, return_exceptions=True)
+
+            delivered = [event.id for event, res in zip(events, results) if not isinstance(res, BaseException)]
+            if delivered:
+                await session.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(delivered)))
+                await session.commit()
+                outbox_published.inc(len(delivered))
+
+            failed = next((res for res in results if isinstance(res, BaseException)), None)
+            if failed is not None:
+                raise failed
+            return len(delivered)
+
+    async def _hold_lease(self, session: AsyncSession) -> bool:
+        """Take or renew the relay lease; False while another relay holds it."""
+        now = time.time()
+        lease = (await session.execute(
+            select(OutboxLease.owner, OutboxLease.lease_until).where(OutboxLease.name == RELAY_LEASE)
+        )).first()
+        if lease is not None and lease.lease_until > now:
+            if lease.owner != self.owner:
+                return False
+            if lease.lease_until - now > self.lease_seconds / 2:
+                return True  # renewed recently; skip the write
+
+        stmt = sqlite_insert(OutboxLease).values(name=RELAY_LEASE, owner=self.owner,
+                                                 lease_until=now + self.lease_seconds)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OutboxLease.name],
+            set_={"owner": stmt.excluded.owner, "lease_until": stmt.excluded.lease_until},
+            # SQLite serializes writers, so only one relay can win an expired lease
+            where=(OutboxLease.owner == self.owner) | (OutboxLease.lease_until <= now),
+        )
+        result = await session.execute(stmt)
+        await session.commit()
+        if result.rowcount == 1 and (lease is None or lease.owner != self.owner):
+            logger.info(f"Kafka outbox relay {self.owner} took the relay lease")
+        return result.rowcount == 1
+
+    async def _release_lease(self):
+        """Hand the lease over right away instead of letting it expire."""
+        if database.AsyncSessionLocal is None:
+            return
+        try:
+            async with database.AsyncSessionLocal() as session:
+                await session.execute(update(OutboxLease)
+                                      .where(OutboxLease.name == RELAY_LEASE, OutboxLease.owner == self.owner)
+                                      .values(lease_until=0))
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Could not release the Kafka outbox relay lease: {e}")
+
+
+outbox_relay = OutboxRelay(
+    kafka_producer,
+    batch_size=settings.KAFKA_OUTBOX_BATCH_SIZE,
+    poll_interval=settings.KAFKA_OUTBOX_POLL_INTERVAL_MS / 1000,
+    retry_base=settings.KAFKA_OUTBOX_RETRY_BASE_SECONDS,
+    retry_max=settings.KAFKA_OUTBOX_RETRY_MAX_SECONDS,
+    lease_seconds=settings.KAFKA_OUTBOX_LEASE_SECONDS,
+)
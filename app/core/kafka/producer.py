@@ -1,9 +1,19 @@
 # app/core/kafka/producer_service.py
 import asyncio
-import json
 import logging
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
 from aiokafka import AIOKafkaProducer
 
+from app.core.kafka.codecs import CONTENT_TYPE_HEADER, TopicCodecs
+from app.core.setting import settings
+
+
+def _serialize_key(key: Any) -> Optional[bytes]:
+    if key is None or isinstance(key, bytes):
+        return key
+    return str(key).encode("utf-8")
+
 
 class KafkaProducer:
     _instance = None
@@ -13,8 +23,22 @@ class KafkaProducer:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self, brokers: str = "localhost:9096"):
+    def __init__(self, brokers: str = settings.KAFKA_BROKERS, linger_ms: int = settings.KAFKA_LINGER_MS,
+                 max_batch_size: int = settings.KAFKA_MAX_BATCH_SIZE,
+                 compression: str = settings.KAFKA_COMPRESSION,
+                 enable_idempotence: bool = settings.KAFKA_ENABLE_IDEMPOTENCE,
+                 request_timeout_ms: int = settings.KAFKA_REQUEST_TIMEOUT_MS,
+                 codecs: Optional[TopicCodecs] = None):
         self.brokers = brokers
+        self.linger_ms = linger_ms
+        self.max_batch_size = max_batch_size
+        # Idempotence (implies acks=all) keeps broker-side retries from duplicating or reordering records
+        self.enable_idempotence = enable_idempotence
+        self.request_timeout_ms = request_timeout_ms
+        # none | gzip | snappy | lz4 | zstd (all but gzip need aiokafka's compression extras)
+        self.compression = None if compression in ("", "none") else compression
+        # Payload codec per topic (KAFKA_TOPIC_CODECS / KAFKA_DEFAULT_CODEC)
+        self.codecs = codecs or TopicCodecs()
         self.producer: AIOKafkaProducer | None = None
         self.started = False
 
@@ -26,23 +50,54 @@ class KafkaProducer:
 
         self.producer = AIOKafkaProducer(
             bootstrap_servers=self.brokers,
-            value_serializer=lambda x: json.dumps(x).encode("utf-8")
+            key_serializer=_serialize_key,
+            linger_ms=self.linger_ms,
+            max_batch_size=self.max_batch_size,
+            compression_type=self.compression,
+            enable_idempotence=self.enable_idempotence,
+            request_timeout_ms=self.request_timeout_ms,
         )
-        await self.producer.start()
+        try:
+            await self.producer.start()
+        except Exception:
+            await self.producer.stop()
+            raise
 
         self.started = True
         logging.info("Kafka producer started.")
 
     async def stop(self):
         if self.producer:
+            # Flushes whatever is still lingering in the accumulator
             await self.producer.stop()
+            self.started = False
             logging.info("Kafka producer stopped.")
 
-    async def send_message(self, topic: str, message: dict):
-        """Gửi message từ bất kỳ service nào."""
+    async def publish(self, topic: str, message: Any, key: Any = None,
+                      headers: Optional[Sequence[Tuple[str, bytes]]] = None) -> asyncio.Future:
+        """
+        Queue a message and return its delivery future without waiting for the broker.
+        Returns as soon as the message is in the batch accumulator (only waits when
+        the accumulator is full); await the future for the RecordMetadata.
+        The message is encoded with the topic's codec and tagged with its content-type.
+        """
         if not self.started:
             raise RuntimeError("Kafka producer has not started!")
-        await self.producer.send_and_wait(topic, message)
+        codec = self.codecs.for_topic(topic)
+        headers = [*(headers or ()), (CONTENT_TYPE_HEADER, codec.content_type.encode())]
+        return await self.producer.send(topic, codec.encode(message), key=key, headers=headers)
+
+    async def publish_many(self, topic: str, messages: Iterable[Any], key=None) -> List[asyncio.Future]:
+        """
+        Queue many messages at once; they are batched (linger_ms / max_batch_size).
+        key: a fixed key, or a callable deriving the key from each message.
+        """
+        key_of = key if callable(key) else (lambda _: key)
+        return [await self.publish(topic, message, key_of(message)) for message in messages]
+
+    async def send_message(self, topic: str, message: dict):
+        """Gửi message từ bất kỳ service nào."""
+        await (await self.publish(topic, message))
 
 
 # Singleton instance
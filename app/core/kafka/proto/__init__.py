@@ -0,0 +1,5 @@
+"""Proto definitions for Kafka event payloads."""
+
+from app.core.kafka.proto import telemetry_pb2
+
+__all__ = ["telemetry_pb2"]
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: app/core/kafka/proto/telemetry.proto
+# Protobuf Python Version: 6.31.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    6,
+    31,
+    1,
+    '',
+    'app/core/kafka/proto/telemetry.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n$app/core/kafka/proto/telemetry.proto\x12\nedge.kafka\"\xc4\x01\n\x0f\x44\x65viceTelemetry\x12\x11\n\tdevice_id\x18\x01 \x01(\t\x12\r\n\x05\x65vent\x18\x02 \x01(\t\x12\x14\n\x0ctimestamp_ms\x18\x03 \x01(\x03\x12\x39\n\x07metrics\x18\x04 \x03(\x0b\x32(.edge.kafka.DeviceTelemetry.MetricsEntry\x12\x0e\n\x06status\x18\x05 \x01(\t\x1a.\n\x0cMetricsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x01:\x02\x38\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'app.core.kafka.proto.telemetry_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_DEVICETELEMETRY_METRICSENTRY']._loaded_options = None
+  _globals['_DEVICETELEMETRY_METRICSENTRY']._serialized_options = b'8\001'
+  _globals['_DEVICETELEMETRY']._serialized_start=53
+  _globals['_DEVICETELEMETRY']._serialized_end=249
+  _globals['_DEVICETELEMETRY_METRICSENTRY']._serialized_start=203
+  _globals['_DEVICETELEMETRY_METRICSENTRY']._serialized_end=249
+# @@protoc_insertion_point(module_scope)
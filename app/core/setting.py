@@ -1,4 +1,4 @@
-from typing import Optional, List, Union
+from typing import Dict, Optional, List, Union
 
 from pydantic import computed_field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -18,6 +18,45 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRES_IN_DAYS: int = 7
     JWT_ALGORITHM: str = "HS256"
     JWT_SECRET_KEY: str
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 10000
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+    USER_COUNT_CACHE_TTL_SECONDS: float = 60.0
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 1.0
+    RATE_LIMIT_ENABLED: bool = True
+    # "METHOD path" -> {"ip" | "account": "capacity/period_seconds"}; account = email in the JSON body
+    RATE_LIMIT_RULES: Dict[str, Dict[str, str]] = {
+        "POST /api/user/login": {"ip": "20/60", "account": "5/60"},
+        "POST /api/user/refresh": {"ip": "60/60"},
+        "POST /api/user/register": {"ip": "10/60"},
+    }
+    RATE_LIMIT_MAX_BUCKETS: int = 100_000
+    RATE_LIMIT_TRUST_FORWARDED: bool = False
+    KAFKA_BROKERS: str = "localhost:9096"
+    KAFKA_LINGER_MS: int = 5
+    KAFKA_MAX_BATCH_SIZE: int = 64 * 1024
+    KAFKA_COMPRESSION: str = "none"
+    KAFKA_ENABLE_IDEMPOTENCE: bool = True
+    KAFKA_REQUEST_TIMEOUT_MS: int = 30000
+    KAFKA_USER_EVENTS_TOPIC: str = "demo"
+    KAFKA_OUTBOX_BATCH_SIZE: int = 500
+    KAFKA_OUTBOX_POLL_INTERVAL_MS: int = 200
+    KAFKA_OUTBOX_RETRY_BASE_SECONDS: float = 0.5
+    KAFKA_OUTBOX_RETRY_MAX_SECONDS: float = 30.0
+    KAFKA_OUTBOX_LEASE_SECONDS: float = 60.0
+    KAFKA_CONSUMER_GROUP_ID: Optional[str] = "edge"
+    KAFKA_CONSUMER_AUTO_OFFSET_RESET: str = "latest"
+    KAFKA_CONSUMER_WORKERS: int = 8
+    KAFKA_CONSUMER_MAX_RECORDS: int = 500
+    KAFKA_CONSUMER_POLL_TIMEOUT_MS: int = 1000
+    KAFKA_CONSUMER_LANE_QUEUE_SIZE: int = 1000
+    KAFKA_CONSUMER_COMMIT_INTERVAL_MS: int = 1000
+    KAFKA_CONSUMER_MAX_RETRIES: int = 3
+    KAFKA_CONSUMER_DEAD_LETTER_SUFFIX: str = ".dlq"
+    KAFKA_DEFAULT_CODEC: str = "json"
+    KAFKA_TOPIC_CODECS: Dict[str, str] = {}
     UPLOAD_PATH: str = "uploads"
     MINIO_ENDPOINT: str = "localhost:9000"
     MINIO_PUBLIC_ENDPOINT: str
@@ -26,6 +65,53 @@ class Settings(BaseSettings):
     MINIO_BUCKET_NAME: str
     MINIO_SECURE: bool = False
     MINIO_PUBLIC_SECURE: bool = False
+    MINIO_UPLOAD_QUEUE_PATH: str = "uploads/minio_upload_queue.db"
+    MINIO_UPLOAD_CONCURRENCY: int = 2
+    MINIO_UPLOAD_MAX_ATTEMPTS: int = 8
+    MINIO_UPLOAD_RETRY_BASE_SECONDS: float = 2.0
+    MINIO_UPLOAD_RETRY_MAX_SECONDS: float = 300.0
+    MINIO_UPLOAD_BATCH_THRESHOLD_BYTES: int = 5 * 1024 * 1024
+    MINIO_UPLOAD_BATCH_MAX_BYTES: int = 64 * 1024 * 1024
+    MINIO_UPLOAD_BATCH_PREFIX: str = "batches"
+    MINIO_UPLOAD_PART_SIZE: int = 10 * 1024 * 1024
+    MINIO_UPLOAD_DELETE_LOCAL: bool = False
+    MINIO_PRESIGN_CACHE_SIZE: int = 10000
+    MINIO_PRESIGN_WINDOW_SECONDS: int = 3600
+    WS_SEND_TIMEOUT_SECONDS: float = 2.0
+    WS_JSON_BACKEND: str = "json"
+    WS_FRAME_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    WS_MAX_FPS: float = 0
+    WS_ADAPTIVE_FPS: bool = True
+    WS_ADAPTIVE_FPS_HEADROOM: float = 1.5
+    WS_MIN_FPS: float = 5
+    WS_BROADCAST_BACKEND: str = "local"
+    WS_IPC_SOCKET_DIR: str = "/tmp/edge-ws"
+    WS_IPC_PEER_BUFFER_BYTES: int = 8 * 1024 * 1024
+    GRPC_HOST: str = "[::]"
+    GRPC_PORT: int = 50051
+    GRPC_RUN_MODE: str = "inline"
+    GRPC_MAX_RECEIVE_MESSAGE_BYTES: int = 64 * 1024 * 1024
+    GRPC_MAX_SEND_MESSAGE_BYTES: int = 4 * 1024 * 1024
+    GRPC_KEEPALIVE_TIME_MS: int = 30000
+    GRPC_KEEPALIVE_TIMEOUT_MS: int = 10000
+    GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS: bool = True
+    GRPC_MIN_PING_INTERVAL_MS: int = 10000
+    GRPC_MAX_CONCURRENT_STREAMS: int = 100
+    GRPC_MAXIMUM_CONCURRENT_RPCS: Optional[int] = None
+    GRPC_COMPRESSION: str = "none"
+    GRPC_SPAWN_INGEST_PROCESS: bool = False
+    CLARIUS_SHM_NAME: str = "edge_clarius_frames"
+    CLARIUS_SHM_SLOTS: int = 32
+    CLARIUS_SHM_SLOT_BYTES: int = 2 * 1024 * 1024
+    CLARIUS_SHM_POLL_INTERVAL_MS: float = 2
+    RECORDER_ENABLED: bool = False
+    RECORDER_PATH: str = "recordings"
+    RECORDER_SEGMENT_BYTES: int = 256 * 1024 * 1024
+    RECORDER_FLUSH_INTERVAL_MS: float = 200
+    RECORDER_BATCH_BYTES: int = 4 * 1024 * 1024
+    RECORDER_MAX_PENDING_BYTES: int = 64 * 1024 * 1024
+    RECORDER_FSYNC_INTERVAL_SECONDS: float = 1.0
+    RECORDER_UPLOAD_ENABLED: bool = False
 
     @field_validator("ALLOW_ORIGINS", mode="before")
     @classmethod
@@ -34,6 +120,14 @@ class Settings(BaseSettings):
             return [i.strip() for i in v.split(",")]
         return v
 
+    @field_validator("GRPC_MAXIMUM_CONCURRENT_RPCS", mode="before")
+    @classmethod
+    def empty_as_none(cls, v):
+        # "GRPC_MAXIMUM_CONCURRENT_RPCS=" in .env means unlimited
+        if isinstance(v, str) and not v.strip():
+            return None
+        return v
+
     @computed_field
     @property
     def database_url(self) -> str:
@@ -0,0 +1,172 @@
+"""
+Broadcast backends that carry WebSocket traffic between uvicorn workers.
+
+ConnectionManager always delivers to its own sockets directly; a backend only
+forwards the same payload to the other workers on the box, which deliver it to
+theirs. `local` has no peers (single worker). `unix` connects every worker to
+every other one over Unix domain sockets found in WS_IPC_SOCKET_DIR.
+"""
+import asyncio
+import logging
+import os
+import struct
+from typing import Callable, Dict, Optional
+
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+FrameHandler = Callable[[str, bytes, float], None]
+BinaryHandler = Callable[[bytes], None]
+TextHandler = Callable[[Optional[str], str], None]
+
+KIND_FRAME = 1
+KIND_TEXT = 2
+KIND_USER_TEXT = 3
+KIND_BINARY = 4
+
+# kind u8 | received_at f64 | key_len u16 | payload_len u32
+_ENVELOPE = struct.Struct("<BdHI")
+
+ipc_frames_dropped = registry.counter(
+    "ws_ipc_frames_dropped_total", "Frames not forwarded to a peer worker because its link was backed up"
+)
+
+
+class BroadcastBackend:
+    async def start(self, on_frame: FrameHandler, on_binary: BinaryHandler, on_text: TextHandler):
+        pass
+
+    async def stop(self):
+        pass
+
+    def publish_frame(self, stream_id: str, data: bytes, received_at: float):
+        """Forward a frame to the other workers."""
+
+    def publish_binary(self, data: bytes):
+        """Forward a binary message for every socket (regardless of stream) to the other workers."""
+
+    def publish_text(self, text: str, user_id: Optional[str] = None):
+        """Forward an encoded JSON message (to one user, or to everyone) to the other workers."""
+
+
+class LocalBackend(BroadcastBackend):
+    """Single-process deployment: there are no peers to forward to."""
+
+
+class UnixSocketBackend(BroadcastBackend):
+    def __init__(self, socket_dir: str, max_peer_buffer: int, discovery_interval: float = 1.0):
+        self.socket_dir = socket_dir
+        self.max_peer_buffer = max_peer_buffer
+        self.discovery_interval = discovery_interval
+        self.path = os.path.join(socket_dir, f"{os.getpid()}.sock")
+        self.peers: Dict[str, asyncio.StreamWriter] = {}
+        self._server: asyncio.AbstractServer | None = None
+        self._discovery: asyncio.Task | None = None
+        self._on_frame: FrameHandler | None = None
+        self._on_binary: BinaryHandler | None = None
+        self._on_text: TextHandler | None = None
+
+    async def start(self, on_frame: FrameHandler, on_binary: BinaryHandler, on_text: TextHandler):
+        self._on_frame = on_frame
+        self._on_binary = on_binary
+        self._on_text = on_text
+        os.makedirs(self.socket_dir, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle_peer, path=self.path)
+        self._discovery = asyncio.create_task(self._discover_loop())
+        logger.info(f"WebSocket IPC backend listening on {self.path}")
+
+    async def stop(self):
+        if self._discovery:
+            self._discovery.cancel()
+        for writer in self.peers.values():
+            writer.close()
+        self.peers.clear()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def _discover_loop(self):
+        while True:
+            try:
+                await self._discover()
+            except Exception as e:
+                logger.warning(f"WebSocket IPC peer discovery failed: {e}")
+            await asyncio.sleep(self.discovery_interval)
+
+    async def _discover(self):
+        for entry in os.scandir(self.socket_dir):
+            path = entry.path
+            if not entry.name.endswith(".sock") or path == self.path or path in self.peers:
+                continue
+            try:
+                _, writer = await asyncio.open_unix_connection(path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Socket file left behind by a worker that died
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+                continue
+            self.peers[path] = writer
+            logger.info(f"WebSocket IPC connected to peer {entry.name}")
+
+        for path, writer in list(self.peers.items()):
+            if writer.is_closing():
+                del self.peers[path]
+
+    def _send(self, kind: int, key: str, payload: bytes, received_at: float = 0.0):
+        key_bytes = key.encode("utf-8")
+        header = _ENVELOPE.pack(kind, received_at, len(key_bytes), len(payload))
+        for path, writer in list(self.peers.items()):
+            if writer.is_closing():
+                del self.peers[path]
+                continue
+            if kind in (KIND_FRAME, KIND_BINARY) and writer.transport.get_write_buffer_size() > self.max_peer_buffer:
+                ipc_frames_dropped.inc()
+                continue
+            writer.writelines((header, key_bytes, payload))
+
+    def publish_frame(self, stream_id: str, data: bytes, received_at: float):
+        self._send(KIND_FRAME, stream_id, data, received_at)
+
+    def publish_binary(self, data: bytes):
+        self._send(KIND_BINARY, "", data)
+
+    def publish_text(self, text: str, user_id: Optional[str] = None):
+        kind = KIND_TEXT if user_id is None else KIND_USER_TEXT
+        self._send(kind, user_id or "", text.encode("utf-8"))
+
+    async def _handle_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                kind, received_at, key_len, payload_len = _ENVELOPE.unpack(
+                    await reader.readexactly(_ENVELOPE.size)
+                )
+                key = (await reader.readexactly(key_len)).decode("utf-8") if key_len else ""
+                payload = await reader.readexactly(payload_len)
+
+                if kind == KIND_FRAME:
+                    self._on_frame(key, payload, received_at)
+                elif kind == KIND_BINARY:
+                    self._on_binary(payload)
+                elif kind == KIND_TEXT:
+                    self._on_text(None, payload.decode("utf-8"))
+                elif kind == KIND_USER_TEXT:
+                    self._on_text(key, payload.decode("utf-8"))
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+def get_broadcast_backend(name: str, socket_dir: str, max_peer_buffer: int) -> BroadcastBackend:
+    if name == "local":
+        return LocalBackend()
+    if name == "unix":
+        return UnixSocketBackend(socket_dir, max_peer_buffer)
+    raise ValueError(f"Unsupported WS_BROADCAST_BACKEND: {name}")
@@ -15,6 +15,14 @@ AsyncSessionLocal = None
 logger = logging.getLogger(__name__)
 
 
+def runtime_tables():
+    """Tables created at startup (if missing) regardless of migrations."""
+    # Imported here: these modules read this module's session factory
+    from app.core.kafka.outbox import OutboxEvent, OutboxLease
+    from app.modules.auth.security import RevokedToken
+    return [OutboxEvent.__table__, OutboxLease.__table__, RevokedToken.__table__]
+
+
 @asynccontextmanager
 async def lifespan(app):
     global async_engine, AsyncSessionLocal
@@ -38,6 +46,10 @@ async def lifespan(app):
         # async with async_engine.begin() as conn:
         #     await conn.run_sync(Base.metadata.create_all)
 
+        # Infrastructure tables the app writes to on its own are always created
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=runtime_tables())
+
         # Test database connection
         async with async_engine.begin() as conn:
             await conn.execute(text("SELECT 1"))
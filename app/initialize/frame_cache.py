@@ -0,0 +1,42 @@
+from collections import OrderedDict
+from typing import List, Optional
+
+
+class FrameCache:
+    """
+    Latest frame per stream, bounded by total bytes.
+
+    Stores the exact bytes objects that are broadcast, so caching a frame
+    costs no copy. The cached frame is what viewers are sent on join; when the
+    byte budget is exceeded, the least recently updated streams are dropped first.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._frames: "OrderedDict[str, bytes]" = OrderedDict()
+
+    def put(self, stream_id: str, data: bytes):
+        size = len(data)
+        if size > self.max_bytes:
+            return
+
+        previous = self._frames.pop(stream_id, None)
+        if previous is not None:
+            self.total_bytes -= len(previous)
+        self._frames[stream_id] = data
+        self.total_bytes += size
+
+        while self.total_bytes > self.max_bytes:
+            _, oldest = self._frames.popitem(last=False)
+            self.total_bytes -= len(oldest)
+
+    def latest(self, stream_id: str) -> Optional[bytes]:
+        return self._frames.get(stream_id)
+
+    def streams(self) -> List[str]:
+        return list(self._frames.keys())
+
+    def clear(self):
+        self._frames.clear()
+        self.total_bytes = 0
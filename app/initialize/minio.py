@@ -1,7 +1,10 @@
+import time
 from minio import Minio
 from minio.error import S3Error
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable
 from app.core.setting import settings
+from app.utils.cache import TTLCache
 
 
 class MinIOConfig:
@@ -14,6 +17,11 @@ class MinIOConfig:
         self.secure = settings.MINIO_SECURE
         self.public_secure = settings.MINIO_PUBLIC_SECURE
 
+        protocol = "https" if self.public_secure else "http"
+        self.public_url_prefix = f"{protocol}://{self.public_endpoint}/{self.bucket_name}/"
+        self.presign_window = settings.MINIO_PRESIGN_WINDOW_SECONDS
+        self.presigned_urls = TTLCache(maxsize=settings.MINIO_PRESIGN_CACHE_SIZE, ttl=self.presign_window)
+
         # Initialize MinIO client
         self.client = Minio(
             endpoint=self.endpoint,
@@ -52,14 +60,40 @@ class MinIOConfig:
 
     def get_public_url(self, object_name: str) -> str:
         """Return the public URL for a given object."""
-        protocol = "https" if self.public_secure else "http"
-        return f"{protocol}://{self.public_endpoint}/{self.bucket_name}/{object_name}"
+        return self.public_url_prefix + object_name
 
     def get_presigned_url(self, object_name: str, expires: int = 86400) -> str:
         """Generate a temporary presigned URL (default: 24 hours)."""
-        try:
-            return self.client.presigned_get_object(
-                self.bucket_name, object_name, expires=timedelta(seconds=expires)
-            )
-        except S3Error as e:
-            raise RuntimeError(f"Failed to generate presigned URL: {e}")
+        return self.get_presigned_urls([object_name], expires)[object_name]
+
+    def get_presigned_urls(self, object_names: Iterable[str], expires: int = 86400) -> Dict[str, str]:
+        """
+        Presigned URLs for many objects at once, reusing cached signatures.
+
+        URLs are signed as of the start of the current window (at most half of
+        `expires` long), so one signature serves every request in that window
+        and always has at least `expires - window` seconds of validity left.
+        """
+        window = max(min(self.presign_window, expires // 2), 1)
+        now = time.time()
+        window_start = int(now // window) * window
+        remaining = window_start + window - now
+
+        urls = {}
+        request_date = None
+        for object_name in object_names:
+            key = (object_name, expires, window_start)
+            url = self.presigned_urls.get(key)
+            if url is None:
+                if request_date is None:
+                    request_date = datetime.fromtimestamp(window_start, tz=timezone.utc)
+                try:
+                    url = self.client.presigned_get_object(
+                        self.bucket_name, object_name, expires=timedelta(seconds=expires),
+                        request_date=request_date,
+                    )
+                except S3Error as e:
+                    raise RuntimeError(f"Failed to generate presigned URL: {e}")
+                self.presigned_urls.set(key, url, ttl=remaining)
+            urls[object_name] = url
+        return urls
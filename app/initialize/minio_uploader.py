@@ -0,0 +1,308 @@
+"""
+Asynchronous background uploads to MinIO.
+
+Uploads are recorded in a persistent SQLite queue first, so pending work
+survives restarts, then executed on a bounded thread pool so the blocking
+MinIO client never runs on the event loop. Files at or above
+MINIO_UPLOAD_BATCH_THRESHOLD_BYTES are uploaded individually (multipart for
+large files); smaller ones are bundled into one tar object per batch under
+MINIO_UPLOAD_BATCH_PREFIX, each member named after its object name. Failures
+are retried with exponential backoff up to MINIO_UPLOAD_MAX_ATTEMPTS.
+"""
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import tarfile
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from app.core.metrics import registry
+from app.core.setting import settings
+
+logger = logging.getLogger(__name__)
+
+minio_uploads = registry.counter(
+    "minio_uploads_total", "Background MinIO upload attempts by outcome", ("outcome",)
+)
+
+
+@dataclass
+class UploadItem:
+    id: int
+    path: str
+    object_name: str
+    content_type: str
+    size: int
+    attempts: int
+
+
+class UploadQueue:
+    """Durable queue of pending uploads (stdlib sqlite3; safe to share across processes)."""
+
+    PENDING = "pending"
+    FAILED = "failed"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS uploads (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    path TEXT NOT NULL,
+                    object_name TEXT NOT NULL,
+                    content_type TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_uploads_due ON uploads (status, next_attempt_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, path: str, object_name: str, content_type: str) -> int:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO uploads (path, object_name, content_type, size, created_at) VALUES (?, ?, ?, ?, ?)",
+                (path, object_name, content_type, os.path.getsize(path), time.time()),
+            )
+            return cursor.lastrowid
+
+    def due(self, now: float, limit: int) -> List[UploadItem]:
+        rows = self._connect().execute(
+            "SELECT id, path, object_name, content_type, size, attempts FROM uploads "
+            "WHERE status = ? AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+            (self.PENDING, now, limit),
+        ).fetchall()
+        return [UploadItem(*row) for row in rows]
+
+    def next_due_at(self) -> Optional[float]:
+        row = self._connect().execute(
+            "SELECT MIN(next_attempt_at) FROM uploads WHERE status = ?", (self.PENDING,)
+        ).fetchone()
+        return row[0]
+
+    def complete(self, ids: List[int]):
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM uploads WHERE id = ?", [(i,) for i in ids])
+
+    def retry(self, ids: List[int], error: str, next_attempt_at: float, max_attempts: int):
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE uploads SET attempts = attempts + 1, last_error = ?, next_attempt_at = ?, "
+                "status = CASE WHEN attempts + 1 >= ? THEN ? ELSE status END WHERE id = ?",
+                [(error, next_attempt_at, max_attempts, self.FAILED, i) for i in ids],
+            )
+
+    def pending_count(self) -> int:
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM uploads WHERE status = ?", (self.PENDING,)
+        ).fetchone()[0]
+
+
+class MinIOUploader:
+    def __init__(self, queue_path: str, concurrency: int, max_attempts: int, retry_base: float,
+                 retry_max: float, batch_threshold: int, batch_max_bytes: int, batch_prefix: str,
+                 part_size: int, delete_local: bool, stop_timeout: float = 30.0):
+        self.queue_path = queue_path
+        self.concurrency = max(concurrency, 1)
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.batch_threshold = batch_threshold
+        self.batch_max_bytes = batch_max_bytes
+        self.batch_prefix = batch_prefix
+        self.part_size = part_size
+        self.delete_local = delete_local
+        self.stop_timeout = stop_timeout
+
+        self.queue: UploadQueue | None = None
+        self.running = False
+        self._executor: ThreadPoolExecutor | None = None
+        self._minio = None
+        self._minio_lock = threading.Lock()
+        self._slots: asyncio.Semaphore | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._in_flight: set = set()
+        # Jobs settled while a due-query was running; its snapshot may still list them
+        self._settled: set = set()
+        self._jobs: set = set()
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        self.queue = await asyncio.to_thread(UploadQueue, self.queue_path)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="minio-upload")
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.create_task(self._run())
+        self.running = True
+        logger.info(f"MinIO uploader started ({await asyncio.to_thread(self.queue.pending_count)} pending)")
+
+    async def stop(self):
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._jobs:
+            # Let in-flight uploads finish and be marked done, or they are uploaded again on restart
+            _, unfinished = await asyncio.wait(self._jobs, timeout=self.stop_timeout)
+            if unfinished:
+                logger.warning(f"{len(unfinished)} upload job(s) still running at shutdown; they will be retried")
+                for job in unfinished:
+                    job.cancel()
+        if self._executor:
+            # Anything not completed stays queued for the next start
+            await asyncio.to_thread(self._executor.shutdown, True)
+
+    async def submit(self, path: str, object_name: str, content_type: str = "application/octet-stream") -> int:
+        """Queue a local file for upload; returns as soon as the job is durably recorded."""
+        upload_id = await asyncio.to_thread(self.queue.add, path, object_name, content_type)
+        self._wakeup.set()
+        return upload_id
+
+    def submit_threadsafe(self, path: str, object_name: str, content_type: str = "application/octet-stream"):
+        """Queue an upload from a worker thread (e.g. the recorder's writer)."""
+        self.queue.add(path, object_name, content_type)
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # -----------------------
+    # SCHEDULING
+    # -----------------------
+    async def _run(self):
+        while True:
+            self._settled.clear()
+            due = await asyncio.to_thread(self.queue.due, time.time(), self.concurrency * 64)
+            due = [item for item in due if item.id not in self._in_flight and item.id not in self._settled]
+            if not due:
+                await self._sleep_until_due()
+                continue
+
+            for job in self._plan(due):
+                await self._slots.acquire()
+                self._in_flight.update(item.id for item in job)
+                task = asyncio.create_task(self._execute(job))
+                self._jobs.add(task)
+                task.add_done_callback(self._jobs.discard)
+
+    async def _sleep_until_due(self):
+        # Due rows that are already in flight wake us when their job settles
+        next_due = await asyncio.to_thread(self.queue.next_due_at)
+        now = time.time()
+        timeout = 5.0 if next_due is None or next_due <= now else min(next_due - now, 5.0)
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    def _plan(self, items: List[UploadItem]) -> List[List[UploadItem]]:
+        """Large files go alone; small files are grouped into bundles of up to batch_max_bytes."""
+        jobs, bundle, bundle_bytes = [], [], 0
+        for item in items:
+            if item.size >= self.batch_threshold:
+                jobs.append([item])
+                continue
+            if bundle and bundle_bytes + item.size > self.batch_max_bytes:
+                jobs.append(bundle)
+                bundle, bundle_bytes = [], 0
+            bundle.append(item)
+            bundle_bytes += item.size
+        if bundle:
+            jobs.append(bundle)
+        return jobs
+
+    async def _execute(self, job: List[UploadItem]):
+        ids = [item.id for item in job]
+        try:
+            await self._loop.run_in_executor(self._executor, self._upload, job)
+            await asyncio.to_thread(self.queue.complete, ids)
+            minio_uploads.labels("success").inc(len(job))
+        except Exception as e:
+            attempts = min(item.attempts for item in job) + 1
+            delay = min(self.retry_base * 2 ** (attempts - 1), self.retry_max) * random.uniform(0.8, 1.2)
+            await asyncio.to_thread(self.queue.retry, ids, str(e), time.time() + delay, self.max_attempts)
+            minio_uploads.labels("retry" if attempts < self.max_attempts else "failed").inc(len(job))
+            logger.warning(f"Upload of {len(job)} object(s) failed (attempt {attempts}): {e}")
+        finally:
+            self._in_flight.difference_update(ids)
+            self._settled.update(ids)
+            self._slots.release()
+            self._wakeup.set()
+
+    # -----------------------
+    # UPLOAD (worker threads)
+    # -----------------------
+    def _client(self):
+        # MinIOConfig checks the bucket over the network on construction: do it here, off the loop
+        with self._minio_lock:
+            if self._minio is None:
+                from app.initialize.minio import MinIOConfig
+                self._minio = MinIOConfig()
+            return self._minio
+
+    def _upload(self, job: List[UploadItem]):
+        minio = self._client()
+        if len(job) == 1 and job[0].size >= self.batch_threshold:
+            item = job[0]
+            minio.client.fput_object(minio.bucket_name, item.object_name, item.path,
+                                     content_type=item.content_type, part_size=self.part_size)
+        else:
+            self._upload_bundle(minio, job)
+
+        if self.delete_local:
+            for item in job:
+                try:
+                    os.remove(item.path)
+                except OSError:
+                    pass
+
+    def _upload_bundle(self, minio, job: List[UploadItem]):
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        object_name = f"{self.batch_prefix}/{stamp}-{job[0].id}-{job[-1].id}.tar"
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+            with tarfile.open(fileobj=spool, mode="w") as tar:
+                for item in job:
+                    tar.add(item.path, arcname=item.object_name)
+            length = spool.tell()
+            spool.seek(0)
+            minio.client.put_object(minio.bucket_name, object_name, spool, length=length,
+                                    content_type="application/x-tar", part_size=self.part_size)
+
+
+minio_uploader = MinIOUploader(
+    queue_path=settings.MINIO_UPLOAD_QUEUE_PATH,
+    concurrency=settings.MINIO_UPLOAD_CONCURRENCY,
+    max_attempts=settings.MINIO_UPLOAD_MAX_ATTEMPTS,
+    retry_base=settings.MINIO_UPLOAD_RETRY_BASE_SECONDS,
+    retry_max=settings.MINIO_UPLOAD_RETRY_MAX_SECONDS,
+    batch_threshold=settings.MINIO_UPLOAD_BATCH_THRESHOLD_BYTES,
+    batch_max_bytes=settings.MINIO_UPLOAD_BATCH_MAX_BYTES,
+    batch_prefix=settings.MINIO_UPLOAD_BATCH_PREFIX,
+    part_size=settings.MINIO_UPLOAD_PART_SIZE,
+    delete_local=settings.MINIO_UPLOAD_DELETE_LOCAL,
+)
@@ -1,69 +1,372 @@
+import asyncio
 import json
-from typing import Dict, Set
+import logging
+import struct
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
 
 from fastapi import WebSocket
 
+from app.core.metrics import registry
+from app.core.setting import settings
+from app.initialize.broadcast import BroadcastBackend, get_broadcast_backend
+from app.initialize.frame_cache import FrameCache
+
+try:
+    import orjson
+except ImportError:  # optional faster JSON backend, from the "ws" extra
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Subscribing to this stream receives frames from every probe
+ALL_STREAMS = "*"
+
+# Binary messages are stream_len (u16) | stream_id (UTF-8) | payload
+FRAME_HEADER = struct.Struct("<H")
+
+frame_delivery_latency = registry.histogram(
+    "clarius_frame_delivery_latency_seconds",
+    "Time from gRPC frame receipt to completed WebSocket send",
+)
+frames_dropped = registry.counter(
+    "ws_frames_dropped_total",
+    "Frames dropped or skipped because a viewer fell behind",
+)
+
+
+def _json_dumps(message) -> str:
+    return json.dumps(message)
+
+
+def _orjson_dumps(message) -> str:
+    return orjson.dumps(message).decode("utf-8")
+
+
+def frame_message(stream_id: str, data: bytes) -> bytes:
+    """Prefix a frame with its stream id so viewers of several probes can tell them apart."""
+    stream = stream_id.encode("utf-8")
+    if len(stream) > 0xFFFF:
+        stream = stream[:0xFFFF].decode("utf-8", "ignore").encode("utf-8")
+    return FRAME_HEADER.pack(len(stream)) + stream + data
+
+
+def get_json_encoder(backend: str):
+    """Return the JSON encoder for WS_JSON_BACKEND; raises if it is unknown or its library is not installed."""
+    if backend == "json":
+        return _json_dumps
+    if backend == "orjson":
+        if orjson is None:
+            raise RuntimeError("WS_JSON_BACKEND=orjson but orjson is not installed: poetry install --extras ws "
+                               "(or pip install orjson)")
+        return _orjson_dumps
+    raise ValueError(f"Unknown WS_JSON_BACKEND {backend!r}")
+
+
+class ClientConnection:
+    """
+    A WebSocket with its own writer task and, per stream, a latest-frame slot and
+    pacing deadline, so a busy probe can neither evict nor out-pace a quiet one.
+    """
+
+    # Weight of the newest sample in the send-latency moving average
+    LATENCY_EWMA_ALPHA = 0.2
+
+    def __init__(self, websocket: WebSocket, user_id: str, max_fps: float = 0):
+        self.websocket = websocket
+        self.user_id = user_id
+        # stream_id -> newest frame not yet sent
+        self.pending: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self.ready = asyncio.Event()
+        self.dropped = 0
+        self.streams: Set[str] = set()
+        self.writer: asyncio.Task | None = None
+        self.max_fps = max_fps
+        self.send_latency = 0.0
+        # stream_id -> earliest time its next frame may go out
+        self.next_send_at: Dict[str, float] = {}
+
+    def record_send(self, stream_id: str, started: float, latency: float, adaptive: bool, headroom: float,
+                    min_fps: float):
+        """Update the latency average and schedule the earliest time the stream's next frame may go out."""
+        self.send_latency += self.LATENCY_EWMA_ALPHA * (latency - self.send_latency)
+
+        interval = 1.0 / self.max_fps if self.max_fps > 0 else 0.0
+        if adaptive:
+            # A viewer that needs L seconds per send gets at most one frame per L * headroom,
+            # shared between the streams it is waiting on, but never fewer than min_fps per
+            # stream; fast local clients are effectively unpaced.
+            adaptive_interval = self.send_latency * headroom * (len(self.pending) + 1)
+            if min_fps > 0:
+                adaptive_interval = min(adaptive_interval, 1.0 / min_fps)
+            interval = max(interval, adaptive_interval)
+        self.next_send_at[stream_id] = started + interval
+
+    def next_due(self) -> Tuple[str, float]:
+        """The pending stream whose pacing deadline comes first."""
+        return min(((stream_id, self.next_send_at.get(stream_id, 0.0)) for stream_id in self.pending),
+                   key=lambda item: item[1])
+
+    @property
+    def id(self) -> str:
+        return f"{id(self.websocket):x}"
+
+    def enqueue(self, stream_id: str, data: bytes, received_at: float | None = None):
+        """Keep only the newest frame per stream; a frame of the same stream still waiting is dropped."""
+        if stream_id in self.pending:
+            self.dropped += 1
+            frames_dropped.inc()
+        self.pending[stream_id] = (data, received_at)
+        self.ready.set()
+
+    def forget(self, stream_id: str):
+        self.pending.pop(stream_id, None)
+        self.next_send_at.pop(stream_id, None)
+
+    def close(self):
+        if self.writer and self.writer is not asyncio.current_task():
+            self.writer.cancel()
+
 
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, send_timeout: float = settings.WS_SEND_TIMEOUT_SECONDS,
+                 json_backend: str = settings.WS_JSON_BACKEND,
+                 frame_cache: FrameCache | None = None,
+                 max_fps: float = settings.WS_MAX_FPS,
+                 adaptive_fps: bool = settings.WS_ADAPTIVE_FPS,
+                 backend: BroadcastBackend | None = None):
         self.connections: Dict[str, Set[WebSocket]] = {}
+        # Reverse index socket -> client (and its user_id) keeps disconnect O(1)
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        self.connection_count = 0
+        # stream_id -> subscribed clients, so a frame only touches its viewers
+        self.subscriptions: Dict[str, Set[ClientConnection]] = {}
+        self.send_timeout = send_timeout
+        self.encode = get_json_encoder(json_backend)
+        self.frame_cache = frame_cache or FrameCache(settings.WS_FRAME_CACHE_MAX_BYTES)
+        self.max_fps = max_fps
+        self.adaptive_fps = adaptive_fps
+        # Forwards published traffic to the other workers; local sockets are always served directly
+        self.backend = backend or get_broadcast_backend(settings.WS_BROADCAST_BACKEND,
+                                                        settings.WS_IPC_SOCKET_DIR,
+                                                        settings.WS_IPC_PEER_BUFFER_BYTES)
 
-    async def connect(self, websocket: WebSocket, user_id: str):
+    async def start(self):
+        await self.backend.start(self.deliver_frame, self.deliver_binary, self._deliver_remote_text)
+
+    async def stop(self):
+        await self.backend.stop()
+
+    async def connect(self, websocket: WebSocket, user_id: str, streams: Iterable[str] | None = None,
+                      max_fps: float | None = None):
         await websocket.accept()
         if user_id not in self.connections:
             self.connections[user_id] = set()
         self.connections[user_id].add(websocket)
-        print(f"User {user_id} connected.")
+
+        client = ClientConnection(websocket, user_id, self.max_fps if max_fps is None else max_fps)
+        client.writer = asyncio.create_task(self._write_loop(client))
+        self.clients[websocket] = client
+        self.connection_count += 1
+        self.subscribe(websocket, streams or [ALL_STREAMS])
+        logger.info(f"User {user_id} connected. Total connections: {self.connection_count}")
 
     def disconnect(self, websocket: WebSocket):
-        for user_id, websockets in list(self.connections.items()):
-            if websocket in websockets:
-                websockets.discard(websocket)
-                if not websockets:
-                    del self.connections[user_id]
-                print(f"User {user_id} disconnected. Total connections: {self.count_all_connections()}")
-                break
+        client = self.clients.pop(websocket, None)
+        if client is None:
+            return
+        client.close()
+        self.connection_count -= 1
+        self._remove_subscriptions(client, list(client.streams))
+
+        user_id = client.user_id
+        websockets = self.connections.get(user_id)
+        if websockets is not None:
+            websockets.discard(websocket)
+            if not websockets:
+                del self.connections[user_id]
+        logger.info(f"User {user_id} disconnected. Total connections: {self.connection_count}")
+
+    def subscribe(self, websocket: WebSocket, streams: Iterable[str]):
+        """Add stream subscriptions; subscribing to specific streams replaces the default '*'."""
+        client = self.clients.get(websocket)
+        if client is None:
+            return
+        streams = set(streams)
+        if ALL_STREAMS not in streams and client.streams == {ALL_STREAMS}:
+            self._remove_subscriptions(client, [ALL_STREAMS])
+        added = streams - client.streams
+        for stream_id in added:
+            self.subscriptions.setdefault(stream_id, set()).add(client)
+            client.streams.add(stream_id)
+
+        # First paint: hand newly subscribed streams their latest cached frame
+        cached_ids = self.frame_cache.streams() if ALL_STREAMS in added else added
+        for stream_id in cached_ids:
+            frame = self.frame_cache.latest(stream_id)
+            if frame is not None:
+                client.enqueue(stream_id, frame)
+
+    def unsubscribe(self, websocket: WebSocket, streams: Iterable[str]):
+        client = self.clients.get(websocket)
+        if client is not None:
+            self._remove_subscriptions(client, [s for s in streams if s in client.streams])
+
+    def _remove_subscriptions(self, client: ClientConnection, streams: Iterable[str]):
+        for stream_id in streams:
+            client.streams.discard(stream_id)
+            client.forget(stream_id)
+            subscribers = self.subscriptions.get(stream_id)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self.subscriptions[stream_id]
+
+    def handle_client_message(self, websocket: WebSocket, text: str):
+        """
+        Apply a control message sent by a viewer, e.g.
+            {"action": "subscribe", "streams": ["probe-1"]}
+            {"action": "unsubscribe", "streams": ["probe-1"]}
+            {"action": "set_max_fps", "max_fps": 15}
+        """
+        try:
+            message = json.loads(text)
+            action = message.get("action")
+            streams = [str(s) for s in message.get("streams", [])]
+            max_fps = float(message.get("max_fps") or 0)
+        except (ValueError, AttributeError, TypeError):
+            logger.debug("Ignoring malformed WebSocket control message")
+            return
+
+        if action == "subscribe":
+            self.subscribe(websocket, streams)
+        elif action == "unsubscribe":
+            self.unsubscribe(websocket, streams)
+        elif action == "set_max_fps" and websocket in self.clients:
+            self.clients[websocket].max_fps = max(max_fps, 0.0)
+
+    async def _write_loop(self, client: ClientConnection):
+        """Send each stream's newest frame once its pacing allows; a slow client only ever delays itself."""
+        while True:
+            if not client.pending:
+                client.ready.clear()
+                await client.ready.wait()
+                continue
+
+            stream_id, due = client.next_due()
+            wait = due - time.monotonic()
+            if wait > 0:
+                # Frames arriving meanwhile replace the pending one; wake early if another stream gets due first
+                client.ready.clear()
+                try:
+                    await asyncio.wait_for(client.ready.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            data, received_at = client.pending.pop(stream_id)
+            started = time.monotonic()
+            if not await self._send(client, data):
+                return
+            finished = time.monotonic()
+            client.record_send(stream_id, started, finished - started, self.adaptive_fps,
+                               settings.WS_ADAPTIVE_FPS_HEADROOM, settings.WS_MIN_FPS)
+            if received_at is not None:
+                frame_delivery_latency.observe(finished - received_at)
+
+    async def _send(self, client: ClientConnection, data: bytes | str) -> bool:
+        """Send with a deadline; evict the client on timeout or error."""
+        ws = client.websocket
+        try:
+            if isinstance(data, str):
+                await asyncio.wait_for(ws.send_text(data), timeout=self.send_timeout)
+            else:
+                await asyncio.wait_for(ws.send_bytes(data), timeout=self.send_timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"Send to {client.user_id} exceeded {self.send_timeout}s, evicting.")
+        except Exception as e:
+            logger.warning(f"Send error to {client.user_id}: {e}")
+
+        self._evict(client)
+        return False
+
+    def _evict(self, client: ClientConnection):
+        self.disconnect(client.websocket)
+        # Closing a half-open socket can hang too, so bound it and don't wait
+        asyncio.create_task(self._close(client.websocket))
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=1008), timeout=self.send_timeout)
+        except Exception:
+            pass
+
+    async def _fan_out(self, clients: list, data: bytes | str):
+        """Send the same encoded payload to all clients concurrently."""
+        if clients:
+            # Latency tracks the slowest healthy client, not the sum
+            await asyncio.gather(*(self._send(client, data) for client in clients))
 
     async def send_to_user(self, user_id: str, message: dict):
+        """Send to all of a user's sockets on every worker; returns whether the user is connected here."""
+        text = self.encode(message)
+        self.backend.publish_text(text, user_id)
+        return await self._send_text_to_user(user_id, text)
+
+    async def _send_text_to_user(self, user_id: str, text: str):
         if user_id not in self.connections:
             return False
 
-        websockets = self.connections[user_id]
-        disconnected = set()
+        clients = [self.clients[ws] for ws in self.connections[user_id] if ws in self.clients]
+        await self._fan_out(clients, text)
+        return True
 
-        for ws in websockets:
-            try:
-                await ws.send_text(json.dumps(message))
-            except Exception as e:
-                print(f"Send error to {user_id}: {e}")
-                disconnected.add(ws)
+    async def broadcast(self, message: dict):
+        await self.broadcast_text(self.encode(message))
 
-        for ws in disconnected:
-            self.disconnect(ws)
+    async def broadcast_text(self, text: str):
+        self.backend.publish_text(text)
+        await self._fan_out(list(self.clients.values()), text)
 
-        return True
+    def _deliver_remote_text(self, user_id: str | None, text: str):
+        if user_id is None:
+            asyncio.create_task(self._fan_out(list(self.clients.values()), text))
+        elif user_id in self.connections:
+            asyncio.create_task(self._send_text_to_user(user_id, text))
 
-    async def broadcast(self, message: dict):
-        for user_id, websockets in list(self.connections.items()):
-            for ws in set(websockets):
-                try:
-                    await ws.send_text(json.dumps(message))
-                except Exception as e:
-                    print(f"Broadcast error to {user_id}: {e}")
-                    self.disconnect(ws)
+    def publish_binary(self, data: bytes):
+        """Enqueue a frame for every client on every worker, regardless of stream subscriptions."""
+        self.backend.publish_binary(data)
+        self.deliver_binary(data)
+
+    def deliver_binary(self, data: bytes):
+        # Not tied to a probe: sent with an empty stream id
+        message = frame_message("", data)
+        for client in self.clients.values():
+            client.enqueue("", message)
 
     async def broadcast_binary(self, data: bytes):
-        dead_clients = []
+        self.publish_binary(data)
 
-        # connections = { user_id: set(WebSocket) }
-        for user_id, websockets in list(self.connections.items()):
-            for ws in list(websockets):
-                try:
-                    await ws.send_bytes(data)
-                except Exception:
-                    dead_clients.append(ws)
-        for ws in dead_clients:
-            self.disconnect(ws)
+    def publish_frame(self, stream_id: str, data: bytes, received_at: float | None = None):
+        """Publish a frame to stream_id subscribers on this and every other worker."""
+        self.backend.publish_frame(stream_id, data, received_at or time.monotonic())
+        self.deliver_frame(stream_id, data, received_at)
+
+    def deliver_frame(self, stream_id: str, data: bytes, received_at: float | None = None):
+        """Enqueue a frame only for local clients subscribed to stream_id (or to every stream)."""
+        # Framed once per worker; the cache keeps the framed bytes so first paint carries the id too
+        data = frame_message(stream_id, data)
+        self.frame_cache.put(stream_id, data)
+        subscribers = self.subscriptions.get(stream_id)
+        everyone = self.subscriptions.get(ALL_STREAMS)
+        if subscribers and everyone:
+            subscribers = subscribers | everyone
+        else:
+            subscribers = subscribers or everyone or ()
+        for client in subscribers:
+            client.enqueue(stream_id, data, received_at)
 
     async def push_task_to_users(self, users: list, message: dict):
         for user_id in users:
@@ -73,11 +376,26 @@ class ConnectionManager:
         return list(self.connections.keys())
 
     def count_all_connections(self):
-        return sum(len(ws_set) for ws_set in self.connections.values())
+        return self.connection_count
+
+    def collect_queue_depths(self):
+        for client in list(self.clients.values()):
+            yield (client.user_id, client.id), len(client.pending)
+
+    def collect_dropped(self):
+        for client in list(self.clients.values()):
+            yield (client.user_id, client.id), client.dropped
 
     async def broadcast_base64(self, base64_data: str):
-        message = {"image": base64_data}
-        await self.broadcast(message)
+        # The base64 alphabet needs no JSON escaping, so wrap the frame without re-encoding it
+        await self.broadcast_text('{"image": "' + base64_data + '"}')
 
 
 socket_manage = ConnectionManager()
+
+registry.callback("ws_connections", "Open WebSocket connections", "gauge", (),
+                  lambda: [((), socket_manage.count_all_connections())])
+registry.callback("ws_client_queue_depth", "Streams with a frame waiting to be sent to a viewer", "gauge",
+                  ("user", "client"), socket_manage.collect_queue_depths)
+registry.callback("ws_client_frames_dropped", "Frames dropped for a connected viewer", "gauge",
+                  ("user", "client"), socket_manage.collect_dropped)
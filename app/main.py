@@ -1,20 +1,25 @@
-import asyncio
 import logging
 from contextlib import asynccontextmanager
 
 import uvicorn
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
 from starlette.websockets import WebSocket
 
 from app.core.kafka.delivery_messages import KafkaDeliveryMessages
 from app.core.kafka.producer import kafka_producer
 from app.core.kafka.consumer import kafka_consumer
+from app.core.kafka.outbox import outbox_relay
+from app.core.metrics import registry
 from app.core.setting import settings
+from app.middlewares.ratelimit_middleware import RateLimitMiddleware
 from app.initialize.database import lifespan as database_lifespan
 from app.initialize.websocket import socket_manage
-from app.modules.clarius.server import start_grpc_server
+from app.modules.clarius.controller import recording_router
+from app.modules.clarius.server import grpc_lifespan
 from app.modules.user.controller import auth_router, user_router
+from app.utils.hasher import password_hasher_pool
 
 
 # ===========================================
@@ -22,34 +27,33 @@ from app.modules.user.controller import auth_router, user_router
 # ===========================================
 @asynccontextmanager
 async def app_lifespan(app: FastAPI):
-    async with database_lifespan(app):
+    # Cross-worker WebSocket fan-out (WS_BROADCAST_BACKEND)
+    await socket_manage.start()
 
-        # Start gRPC server (async)
-        grpc_task = asyncio.create_task(start_grpc_server())
+    # gRPC server runs inline, on its own thread or in the ingest process (GRPC_RUN_MODE)
+    async with database_lifespan(app), grpc_lifespan():
 
-        # Kafka Consumer callback
-        delivery_handler = KafkaDeliveryMessages()
-        kafka_consumer.on_message(delivery_handler.handle)
+        # Kafka Consumer handlers (services are built once here)
+        delivery_handler = await KafkaDeliveryMessages.create()
+        delivery_handler.register(kafka_consumer)
 
-        # Start Kafka Producer + Consumer
-        await kafka_producer.start()
-        await kafka_consumer.start()
+        # Kafka Producer (via the outbox relay) + Consumer connect in the background,
+        # so startup does not depend on the broker being reachable
+        await outbox_relay.start()
+        kafka_consumer.start_in_background(settings.KAFKA_OUTBOX_RETRY_MAX_SECONDS)
 
-        logging.info("Startup complete: DB + gRPC + Kafka Producer")
+        logging.info("Startup complete: DB + gRPC + Kafka Outbox Relay")
 
         # Give control back to FastAPI
         yield
 
         # Shutdown Kafka
+        await outbox_relay.stop()
         await kafka_producer.stop()
         await kafka_consumer.stop()
 
-        # Shutdown gRPC
-        grpc_task.cancel()
-        try:
-            await grpc_task
-        except asyncio.CancelledError:
-            logging.info("gRPC server stopped")
+    await socket_manage.stop()
+    password_hasher_pool.shutdown()
 
 
 # ===========================================
@@ -61,9 +65,11 @@ class Application:
         self.manager = socket_manage
 
         self.configure_logging()
+        self.init_rate_limit()
         self.init_cors()
         self.setup_router()
         self.setup_websocket_router()
+        self.setup_metrics_router()
 
     # -----------------------
     # ROUTES
@@ -71,21 +77,49 @@ class Application:
     def setup_router(self):
         self.app.include_router(auth_router, prefix="/api/user", tags=["user"])
         self.app.include_router(user_router, prefix="/api/user", tags=["user"])
+        self.app.include_router(recording_router, prefix="/api/recordings", tags=["recordings"])
 
     # -----------------------
     # WEBSOCKET
     # -----------------------
     def setup_websocket_router(self):
         @self.app.websocket("/ws")
-        async def websocket_endpoint(websocket: WebSocket):
-            await self.manager.connect(websocket, "anonymous_user")
+        async def websocket_endpoint(websocket: WebSocket, streams: str | None = None,
+                                     max_fps: float | None = None):
+            # /ws?streams=probe-1,probe-2 limits the feed to those probes (default: all)
+            # /ws?max_fps=10 caps the frame rate for this viewer
+            stream_ids = [s.strip() for s in streams.split(",") if s.strip()] if streams else None
+            await self.manager.connect(websocket, "anonymous_user", stream_ids, max_fps)
             try:
                 while True:
-                    await websocket.receive()   # nhận text / binary / ping / pong
+                    message = await websocket.receive()   # nhận text / binary / ping / pong
+                    if message.get("text"):
+                        self.manager.handle_client_message(websocket, message["text"])
             except Exception as e:
                 logging.info(f"WebSocket disconnected: {e}")
                 self.manager.disconnect(websocket)
 
+    # -----------------------
+    # METRICS
+    # -----------------------
+    def setup_metrics_router(self):
+        @self.app.get("/metrics", include_in_schema=False)
+        async def metrics_endpoint():
+            return Response(registry.render(), media_type=registry.CONTENT_TYPE)
+
+    # -----------------------
+    # RATE LIMIT
+    # -----------------------
+    def init_rate_limit(self):
+        # Added before CORS so CORS stays outermost and 429 responses carry its headers
+        if settings.RATE_LIMIT_ENABLED:
+            self.app.add_middleware(
+                RateLimitMiddleware,
+                rules=settings.RATE_LIMIT_RULES,
+                max_buckets=settings.RATE_LIMIT_MAX_BUCKETS,
+                trust_forwarded=settings.RATE_LIMIT_TRUST_FORWARDED,
+            )
+
     # -----------------------
     # CORS
     # -----------------------
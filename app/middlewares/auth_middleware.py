@@ -29,11 +29,11 @@ class AuthMiddleware:
             if not token:
                 raise error_exception_handler(AppStatus.UNAUTHORIZED)
 
-            claims = token_service.validate_token(token)
+            claims = await token_service.verify_token(token)
             if not claims:
                 raise error_exception_handler(AppStatus.UNAUTHORIZED)
 
-            user = await auth_repo.find_user_by_id(UUID(claims.get("sub")))
+            user = await auth_repo.find_user_principal(UUID(claims.get("sub")))
             if not user:
                 raise error_exception_handler(AppStatus.UNAUTHORIZED)
 
@@ -0,0 +1,155 @@
+import json
+import logging
+import math
+import time
+from typing import Dict, Optional, Tuple
+
+from app.core.app_status import AppStatus
+
+logger = logging.getLogger(__name__)
+
+IP = "ip"
+ACCOUNT = "account"
+
+# Account identities are read from small JSON bodies only
+MAX_ACCOUNT_BODY_BYTES = 16 * 1024
+
+
+def parse_rate(rate: str) -> Tuple[float, float]:
+    """'5/60' -> (capacity 5, refill 5 tokens per 60 s)."""
+    capacity, period = rate.split("/")
+    return float(capacity), float(capacity) / float(period)
+
+
+class TokenBuckets:
+    """
+    Token buckets stored as key -> (tokens, updated_at, full_at) tuples.
+    A bucket that has refilled completely is equivalent to a missing one,
+    so sweep() drops every bucket past its full_at.
+    """
+
+    def __init__(self, max_buckets: int, sweep_interval: float):
+        self.max_buckets = max_buckets
+        self.sweep_interval = sweep_interval
+        self._buckets: Dict[tuple, Tuple[float, float, float]] = {}
+        self._next_sweep = 0.0
+
+    def take(self, key: tuple, capacity: float, refill: float, now: float) -> float:
+        """Consume one token. Returns 0 if allowed, else seconds until a token is available."""
+        if now >= self._next_sweep or len(self._buckets) >= self.max_buckets:
+            self.sweep(now)
+
+        bucket = self._buckets.get(key)
+        tokens = capacity if bucket is None else min(capacity, bucket[0] + (now - bucket[1]) * refill)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / refill)
+            return (1 - tokens) / refill
+        tokens -= 1
+        self._buckets[key] = (tokens, now, now + (capacity - tokens) / refill)
+        return 0.0
+
+    def sweep(self, now: float):
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+        if len(self._buckets) >= self.max_buckets:
+            # Still full of active buckets (e.g. a spray of source IPs): forget the oldest half
+            by_age = sorted(self._buckets.items(), key=lambda item: item[1][1])
+            self._buckets = dict(by_age[len(by_age) // 2:])
+        self._next_sweep = now + self.sweep_interval
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI per-route rate limiting with per-IP and per-account token buckets.
+
+    rules: {"POST /api/user/login": {"ip": "20/60", "account": "5/60"}}
+    The account is the "email" field of the JSON body. Excess requests get 429
+    with Retry-After before the route (and its hashing / database work) runs.
+    """
+
+    def __init__(self, app, rules: Dict[str, Dict[str, str]], max_buckets: int = 100_000,
+                 sweep_interval: float = 60.0, trust_forwarded: bool = False):
+        self.app = app
+        self.rules = {route: {scope: parse_rate(rate) for scope, rate in limits.items()}
+                      for route, limits in rules.items()}
+        self.buckets = TokenBuckets(max_buckets, sweep_interval)
+        self.trust_forwarded = trust_forwarded
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        route = f"{scope['method']} {scope['path']}"
+        limits = self.rules.get(route)
+        if limits is None:
+            return await self.app(scope, receive, send)
+
+        now = time.monotonic()
+        if IP in limits:
+            capacity, refill = limits[IP]
+            retry_after = self.buckets.take((route, IP, self._client_ip(scope)), capacity, refill, now)
+            if retry_after:
+                return await self._reject(send, retry_after)
+
+        if ACCOUNT in limits:
+            body, receive = await self._buffer_body(receive)
+            account = self._account(body)
+            if account:
+                capacity, refill = limits[ACCOUNT]
+                retry_after = self.buckets.take((route, ACCOUNT, account), capacity, refill, now)
+                if retry_after:
+                    return await self._reject(send, retry_after)
+
+        await self.app(scope, receive, send)
+
+    def _client_ip(self, scope) -> str:
+        if self.trust_forwarded:
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    async def _buffer_body(receive):
+        """Read the request body once and hand the app a receive that replays it."""
+        messages, size = [], 0
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            size += len(message.get("body", b""))
+            if not message.get("more_body") or size > MAX_ACCOUNT_BODY_BYTES:
+                break
+
+        body = b"".join(m.get("body", b"") for m in messages) if size <= MAX_ACCOUNT_BODY_BYTES else b""
+        pending = iter(messages)
+
+        async def replay():
+            message = next(pending, None)
+            return message if message is not None else await receive()
+
+        return body, replay
+
+    @staticmethod
+    def _account(body: bytes) -> Optional[str]:
+        try:
+            email = json.loads(body).get("email")
+        except (ValueError, AttributeError):
+            return None
+        return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+    @staticmethod
+    async def _reject(send, retry_after: float):
+        status = AppStatus.TOO_MANY_REQUESTS
+        body = json.dumps({"detail": {**status.meta, "data": {}}}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(retry_after)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
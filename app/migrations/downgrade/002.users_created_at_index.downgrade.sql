@@ -0,0 +1 @@
+DROP INDEX IF EXISTS ix_users_active_created_at_id;
@@ -0,0 +1 @@
+DROP TABLE IF EXISTS kafka_outbox_lease;
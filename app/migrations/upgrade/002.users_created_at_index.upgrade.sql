@@ -0,0 +1 @@
+CREATE INDEX IF NOT EXISTS ix_users_active_created_at_id ON users (is_active, created_at, id);
@@ -0,0 +1,8 @@
+CREATE TABLE IF NOT EXISTS kafka_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id VARCHAR(36) UNIQUE NOT NULL,
+            topic VARCHAR(255) NOT NULL,
+            key VARCHAR(255),
+            payload TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
@@ -0,0 +1,5 @@
+CREATE TABLE IF NOT EXISTS kafka_outbox_lease (
+            name VARCHAR(64) PRIMARY KEY,
+            owner VARCHAR(255) NOT NULL,
+            lease_until FLOAT NOT NULL
+        );
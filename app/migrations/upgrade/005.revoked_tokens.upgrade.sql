@@ -0,0 +1,7 @@
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+            jti VARCHAR(36) PRIMARY KEY,
+            expires_at FLOAT NOT NULL,
+            revoked_at FLOAT NOT NULL
+        );
+CREATE INDEX IF NOT EXISTS ix_revoked_tokens_expires_at ON revoked_tokens (expires_at);
+CREATE INDEX IF NOT EXISTS ix_revoked_tokens_revoked_at ON revoked_tokens (revoked_at);
@@ -1,10 +1,30 @@
+import hashlib
+import logging
+import time
 import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, Union
 
 import jwt
+from sqlalchemy import Column, Float, String, delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
-from app.modules.user.model import User
+from app.initialize import database
+from app.modules.user.model import Base, User
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Re-read revocations this far behind the newest one seen, for rows committed out of order by other workers
+REVOCATION_SYNC_OVERLAP = 5.0
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(36), primary_key=True)
+    expires_at = Column(Float, nullable=False, index=True)
+    revoked_at = Column(Float, nullable=False, index=True)
 
 
 class TokenService:
@@ -14,11 +34,21 @@ class TokenService:
             algorithm: str,
             access_token_expires_in_minutes: int,
             refresh_token_expires_in_days: int,
+            cache_size: int = 0,
+            revocation_sync_interval: float = 1.0,
     ):
         self.secret_key = secret_key
         self.algorithm = algorithm
         self.access_token_expires_in_minutes = access_token_expires_in_minutes
         self.refresh_token_expires_in_days = refresh_token_expires_in_days
+        # Verified claims keyed by sha256(token), each kept until the token's own exp
+        self.verified_tokens = TTLCache(maxsize=cache_size, ttl=0) if cache_size > 0 else None
+        # Revoked jti -> exp, mirrored from the shared revoked_tokens table; pruned once the token would have
+        # expired anyway
+        self.revoked_jtis: Dict[str, float] = {}
+        self.revocation_sync_interval = revocation_sync_interval
+        self._revocations_seen_until = 0.0
+        self._next_revocation_sync = 0.0
 
     def generate_access_token(self, user: User) -> str:
         """
@@ -77,6 +107,13 @@ class TokenService:
         Returns:
             dict | None: Decoded token payload if valid; None if invalid or expired.
         """
+        digest = None
+        if self.verified_tokens is not None:
+            digest = hashlib.sha256(token.encode()).digest()
+            cached = self.verified_tokens.get(digest)
+            if cached is not None:
+                return None if cached.get("jti") in self.revoked_jtis else cached
+
         try:
             decoded_token = jwt.decode(
                 token,
@@ -84,12 +121,91 @@ class TokenService:
                 algorithms=[self.algorithm],
                 options={"verify_exp": True}
             )
-            return decoded_token
         except jwt.ExpiredSignatureError:
             return None
         except jwt.InvalidTokenError:
             return None
 
+        if decoded_token.get("jti") in self.revoked_jtis:
+            return None
+        if digest is not None and "exp" in decoded_token:
+            self.verified_tokens.set(digest, decoded_token, ttl=decoded_token["exp"] - time.time())
+        return decoded_token
+
+    async def verify_token(self, token: str) -> Union[Dict[str, Any], None]:
+        """
+        Validate a token after picking up revocations made by other workers.
+
+        Args:
+            token (str): The token to validate.
+
+        Returns:
+            dict | None: Decoded token payload if valid and not revoked; None otherwise.
+        """
+        await self.sync_revocations()
+        return self.validate_token(token)
+
+    async def sync_revocations(self, force: bool = False):
+        """Merge revocations from the revoked_tokens table, at most once per revocation_sync_interval."""
+        if not force and time.monotonic() < self._next_revocation_sync:
+            return
+        if database.AsyncSessionLocal is None:
+            return
+        self._next_revocation_sync = time.monotonic() + self.revocation_sync_interval
+
+        now = time.time()
+        try:
+            async with database.AsyncSessionLocal() as session:
+                rows = (await session.execute(
+                    select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at)
+                    .where(RevokedToken.revoked_at >= self._revocations_seen_until - REVOCATION_SYNC_OVERLAP,
+                           RevokedToken.expires_at > now)
+                )).all()
+        except Exception as e:
+            # Keep serving from the local mirror; the next sync picks up what was missed
+            logger.error(f"TokenService.sync_revocations - {e}")
+            return
+
+        revoked = {jti: exp for jti, exp in self.revoked_jtis.items() if exp > now}
+        for jti, expires_at, revoked_at in rows:
+            revoked[jti] = expires_at
+            self._revocations_seen_until = max(self._revocations_seen_until, revoked_at)
+        self.revoked_jtis = revoked
+
+    async def revoke_claims(self, *claims: Dict[str, Any]):
+        """
+        Revoke already validated tokens by jti, in every worker and across restarts.
+
+        The shared table is written first, so a revocation is only reported once it is durable.
+        """
+        now = time.time()
+        rows = [{"jti": c["jti"], "expires_at": c.get("exp", now + self.refresh_token_expires_in_days * 86400),
+                 "revoked_at": now} for c in claims]
+        async with database.AsyncSessionLocal() as session:
+            await session.execute(sqlite_insert(RevokedToken).values(rows).on_conflict_do_nothing())
+            await session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+            await session.commit()
+
+        self.revoked_jtis = {jti: exp for jti, exp in self.revoked_jtis.items() if exp > now}
+        for row in rows:
+            self.revoked_jtis[row["jti"]] = row["expires_at"]
+
+    async def revoke_token(self, token: str) -> bool:
+        """
+        Revoke a token by its jti, effective immediately for cached tokens too.
+
+        Args:
+            token (str): The token to revoke.
+
+        Returns:
+            bool: True if the token was valid and is now revoked.
+        """
+        claims = await self.verify_token(token)
+        if not claims or "jti" not in claims:
+            return False
+        await self.revoke_claims(claims)
+        return True
+
     def generate_token_pair(self, user: User) -> Dict[str, str]:
         """
         Generate both access and refresh tokens.
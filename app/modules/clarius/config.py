@@ -1,9 +1,16 @@
 """Configuration for Clarius gRPC service."""
+from app.core.setting import settings
 
-# gRPC Server Configuration
-GRPC_PORT = 50051
-GRPC_HOST = "[::]"
+# gRPC Server Configuration (see GRPC_* in Settings)
+GRPC_PORT = settings.GRPC_PORT
+GRPC_HOST = settings.GRPC_HOST
 GRPC_ADDRESS = f"{GRPC_HOST}:{GRPC_PORT}"
 
+# Streaming: send a FrameAck every N frames on StreamFramesWithAck
+STREAM_ACK_INTERVAL = 30
+
+# Frames sent without a stream_id are published on this stream
+DEFAULT_STREAM_ID = "default"
+
 # Logging
 LOG_LEVEL = "INFO"
@@ -0,0 +1,48 @@
+import logging
+import struct
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, Query
+from starlette.responses import StreamingResponse
+
+from app.core.app_status import AppStatus
+from app.middlewares.auth_middleware import AuthMiddleware
+from app.modules.clarius.recorder import frame_replay
+from app.utils.response import error_exception_handler, handle_response
+
+logger = logging.getLogger(__name__)
+recording_router = APIRouter()
+
+# Each replayed frame is sent as: ts_ns u64 | length u32 | payload
+REPLAY_FRAME_HEADER = struct.Struct("<QI")
+
+
+@recording_router.get("")
+async def list_recordings(user=Depends(AuthMiddleware.is_user())):
+    recordings = []
+    for stream_id in frame_replay.streams():
+        segments = frame_replay.segments(stream_id)
+        recordings.append({
+            "stream_id": stream_id,
+            "segments": len(segments),
+            "first_frame_at": datetime.fromtimestamp(segments[0] / 1e9, tz=timezone.utc) if segments else None,
+        })
+    return handle_response(recordings)
+
+
+@recording_router.get("/{stream_id}")
+async def replay_recording(stream_id: str,
+                           start_ms: int = Query(..., description="Range start, epoch milliseconds"),
+                           end_ms: int = Query(..., description="Range end (exclusive), epoch milliseconds"),
+                           user=Depends(AuthMiddleware.is_user())):
+    if end_ms <= start_ms:
+        raise error_exception_handler(AppStatus.BAD_REQUEST)
+    if not frame_replay.segments(stream_id):
+        raise error_exception_handler(AppStatus.NOT_FOUND)
+
+    def frames():
+        for ts, payload in frame_replay.read_range(stream_id, start_ms * 1_000_000, end_ms * 1_000_000):
+            yield REPLAY_FRAME_HEADER.pack(ts, len(payload))
+            yield payload
+
+    return StreamingResponse(frames(), media_type="application/octet-stream")
@@ -0,0 +1,56 @@
+"""
+Standalone Clarius ingest process (GRPC_RUN_MODE=process).
+
+Runs the gRPC frame server in its own process and publishes every frame into
+the shared-memory ring, which each uvicorn worker reads to serve /ws.
+
+Usage:
+    python -m app.modules.clarius.ingest
+"""
+import asyncio
+import logging
+import signal
+
+from app.core.setting import settings
+from app.modules.clarius.config import GRPC_PORT
+from app.modules.clarius.server import create_grpc_server, recording_lifespan
+from app.modules.clarius.servicer import FrameServicer
+from app.modules.clarius.shm_ring import ShmFrameRing
+
+logger = logging.getLogger(__name__)
+
+
+async def serve():
+    ring = ShmFrameRing.create(settings.CLARIUS_SHM_NAME, settings.CLARIUS_SHM_SLOTS,
+                               settings.CLARIUS_SHM_SLOT_BYTES)
+    server = create_grpc_server(FrameServicer(ring.write))
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    async with recording_lifespan():
+        await server.start()
+        logger.info(f"Clarius ingest process serving on port {GRPC_PORT}, "
+                    f"ring '{settings.CLARIUS_SHM_NAME}' ({settings.CLARIUS_SHM_SLOTS} x "
+                    f"{settings.CLARIUS_SHM_SLOT_BYTES} bytes)")
+        try:
+            await stop.wait()
+        finally:
+            await server.stop(grace=1.0)
+    ring.close()
+    logger.info("Clarius ingest process stopped")
+
+
+def run_ingest():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    run_ingest()
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1f\x61pp/modules/clarius/frame.proto\x12\x07\x63larius\"\x1c\n\x0c\x46rameRequest\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\"\x0f\n\rFrameResponse2J\n\x0c\x46rameService\x12:\n\tSendFrame\x12\x15.clarius.FrameRequest\x1a\x16.clarius.FrameResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1f\x61pp/modules/clarius/frame.proto\x12\x07\x63larius\"/\n\x0c\x46rameRequest\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\x12\x11\n\tstream_id\x18\x02 \x01(\t\"\x0f\n\rFrameResponse\"(\n\rStreamSummary\x12\x17\n\x0f\x66rames_received\x18\x01 \x01(\x04\"#\n\x08\x46rameAck\x12\x17\n\x0f\x66rames_received\x18\x01 \x01(\x04\x32\xd0\x01\n\x0c\x46rameService\x12:\n\tSendFrame\x12\x15.clarius.FrameRequest\x1a\x16.clarius.FrameResponse\x12?\n\x0cStreamFrames\x12\x15.clarius.FrameRequest\x1a\x16.clarius.StreamSummary(\x01\x12\x43\n\x13StreamFramesWithAck\x12\x15.clarius.FrameRequest\x1a\x11.clarius.FrameAck(\x01\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -32,9 +32,13 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'app.modules.clarius.frame_p
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
   _globals['_FRAMEREQUEST']._serialized_start=44
-  _globals['_FRAMEREQUEST']._serialized_end=72
-  _globals['_FRAMERESPONSE']._serialized_start=74
-  _globals['_FRAMERESPONSE']._serialized_end=89
-  _globals['_FRAMESERVICE']._serialized_start=91
-  _globals['_FRAMESERVICE']._serialized_end=165
+  _globals['_FRAMEREQUEST']._serialized_end=91
+  _globals['_FRAMERESPONSE']._serialized_start=93
+  _globals['_FRAMERESPONSE']._serialized_end=108
+  _globals['_STREAMSUMMARY']._serialized_start=110
+  _globals['_STREAMSUMMARY']._serialized_end=150
+  _globals['_FRAMEACK']._serialized_start=152
+  _globals['_FRAMEACK']._serialized_end=187
+  _globals['_FRAMESERVICE']._serialized_start=190
+  _globals['_FRAMESERVICE']._serialized_end=398
 # @@protoc_insertion_point(module_scope)
@@ -38,6 +38,16 @@ class FrameServiceStub(object):
                 request_serializer=app_dot_modules_dot_clarius_dot_frame__pb2.FrameRequest.SerializeToString,
                 response_deserializer=app_dot_modules_dot_clarius_dot_frame__pb2.FrameResponse.FromString,
                 _registered_method=True)
+        self.StreamFrames = channel.stream_unary(
+                '/clarius.FrameService/StreamFrames',
+                request_serializer=app_dot_modules_dot_clarius_dot_frame__pb2.FrameRequest.SerializeToString,
+                response_deserializer=app_dot_modules_dot_clarius_dot_frame__pb2.StreamSummary.FromString,
+                _registered_method=True)
+        self.StreamFramesWithAck = channel.stream_stream(
+                '/clarius.FrameService/StreamFramesWithAck',
+                request_serializer=app_dot_modules_dot_clarius_dot_frame__pb2.FrameRequest.SerializeToString,
+                response_deserializer=app_dot_modules_dot_clarius_dot_frame__pb2.FrameAck.FromString,
+                _registered_method=True)
 
 
 class FrameServiceServicer(object):
@@ -49,6 +59,18 @@ class FrameServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamFrames(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamFramesWithAck(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_FrameServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -57,6 +79,16 @@ def add_FrameServiceServicer_to_server(servicer, server):
                     request_deserializer=app_dot_modules_dot_clarius_dot_frame__pb2.FrameRequest.FromString,
                     response_serializer=app_dot_modules_dot_clarius_dot_frame__pb2.FrameResponse.SerializeToString,
             ),
+            'StreamFrames': grpc.stream_unary_rpc_method_handler(
+                    servicer.StreamFrames,
+                    request_deserializer=app_dot_modules_dot_clarius_dot_frame__pb2.FrameRequest.FromString,
+                    response_serializer=app_dot_modules_dot_clarius_dot_frame__pb2.StreamSummary.SerializeToString,
+            ),
+            'StreamFramesWithAck': grpc.stream_stream_rpc_method_handler(
+                    servicer.StreamFramesWithAck,
+                    request_deserializer=app_dot_modules_dot_clarius_dot_frame__pb2.FrameRequest.FromString,
+                    response_serializer=app_dot_modules_dot_clarius_dot_frame__pb2.FrameAck.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'clarius.FrameService', rpc_method_handlers)
@@ -94,3 +126,57 @@ class FrameService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def StreamFrames(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/clarius.FrameService/StreamFrames',
+            app_dot_modules_dot_clarius_dot_frame__pb2.FrameRequest.SerializeToString,
+            app_dot_modules_dot_clarius_dot_frame__pb2.StreamSummary.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamFramesWithAck(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/clarius.FrameService/StreamFramesWithAck',
+            app_dot_modules_dot_clarius_dot_frame__pb2.FrameRequest.SerializeToString,
+            app_dot_modules_dot_clarius_dot_frame__pb2.FrameAck.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,281 @@
+"""
+Frame recording to segmented, append-only files with memory-mapped replay.
+
+Layout under RECORDER_PATH:
+    <stream_id>/<first_ts_ns>.seg   frame payloads, back to back
+    <stream_id>/<first_ts_ns>.idx   one INDEX_RECORD (ts_ns, offset, length) per frame
+
+Frames are buffered in memory and written in batches off the event loop
+(os.writev, no join copy); files are fsynced every RECORDER_FSYNC_INTERVAL_SECONDS.
+Replay maps segments with mmap and binary-searches the index, so a time-range
+read touches only the pages it returns. Closed segments can be handed to
+on_segment_closed, e.g. to queue them for upload.
+"""
+import asyncio
+import logging
+import mmap
+import os
+import re
+import struct
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.metrics import registry
+from app.core.setting import settings
+
+logger = logging.getLogger(__name__)
+
+INDEX_RECORD = struct.Struct("<QQQ")
+SEGMENT_SUFFIX = ".seg"
+INDEX_SUFFIX = ".idx"
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.-]")
+
+# Most buffers a single writev accepts
+IOV_MAX = os.sysconf("SC_IOV_MAX") if hasattr(os, "sysconf") else 1024
+
+recorder_frames_written = registry.counter(
+    "clarius_recorder_frames_written_total", "Frames written to recording segments"
+)
+recorder_frames_dropped = registry.counter(
+    "clarius_recorder_frames_dropped_total", "Frames not recorded because the write backlog was full"
+)
+recorder_flush_seconds = registry.histogram(
+    "clarius_recorder_flush_seconds", "Time spent writing one batch of frames to disk"
+)
+
+
+def _writev_all(fd: int, buffers: List[bytes]):
+    """writev in chunks of at most IOV_MAX buffers, resuming after short writes."""
+    pending = [memoryview(buffer) for buffer in buffers if buffer]
+    while pending:
+        chunk = pending[:IOV_MAX]
+        written = os.writev(fd, chunk)
+        done = 0
+        for buffer in chunk:
+            if written < len(buffer):
+                break
+            written -= len(buffer)
+            done += 1
+        pending = pending[done:]
+        if written:
+            pending[0] = pending[0][written:]
+
+
+def stream_dir_name(stream_id: str) -> str:
+    """Filesystem-safe directory name for a stream id."""
+    name = _UNSAFE_CHARS.sub("_", stream_id)
+    return name if name.strip(".") else "_"
+
+
+class _Segment:
+    def __init__(self, directory: str, first_ts: int):
+        base = self.base = os.path.join(directory, f"{first_ts:020d}")
+        self.data_fd = os.open(base + SEGMENT_SUFFIX, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self.index_fd = os.open(base + INDEX_SUFFIX, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self.size = os.fstat(self.data_fd).st_size
+
+    def append(self, frames: List[Tuple[int, bytes]]):
+        index = bytearray()
+        offset = self.size
+        for ts, data in frames:
+            index += INDEX_RECORD.pack(ts, offset, len(data))
+            offset += len(data)
+        # Data before index: an index entry never points at unwritten bytes
+        _writev_all(self.data_fd, [data for _, data in frames])
+        _writev_all(self.index_fd, [index])
+        self.size = offset
+
+    def fsync(self):
+        os.fsync(self.data_fd)
+        os.fsync(self.index_fd)
+
+    def close(self):
+        self.fsync()
+        os.close(self.data_fd)
+        os.close(self.index_fd)
+
+
+class FrameRecorder:
+    def __init__(self, root: str, segment_bytes: int, flush_interval: float, batch_bytes: int,
+                 fsync_interval: float, max_pending_bytes: int):
+        self.root = root
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.batch_bytes = batch_bytes
+        self.fsync_interval = fsync_interval
+        self.max_pending_bytes = max_pending_bytes
+        self.active = False
+        # Called from the writer thread with (path, object_name) for each file of a closed segment
+        self.on_segment_closed: Callable[[str, str], None] | None = None
+
+        self._pending: Dict[str, List[Tuple[int, bytes]]] = {}
+        self._pending_bytes = 0
+        self._segments: Dict[str, _Segment] = {}
+        self._last_fsync = 0.0
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def record(self, stream_id: str, data: bytes):
+        """Buffer a frame for the next batch. Called on the hot path; never touches disk."""
+        if self._pending_bytes + len(data) > self.max_pending_bytes:
+            recorder_frames_dropped.inc()
+            return
+        batch = self._pending.get(stream_id)
+        if batch is None:
+            batch = self._pending[stream_id] = []
+        batch.append((time.time_ns(), data))
+        self._pending_bytes += len(data)
+        if self._pending_bytes >= self.batch_bytes:
+            self._wakeup.set()
+
+    async def start(self):
+        os.makedirs(self.root, exist_ok=True)
+        self._wakeup = asyncio.Event()
+        self.active = True
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Frame recorder writing to {os.path.abspath(self.root)}")
+
+    async def stop(self):
+        self.active = False
+        if self._task:
+            # Let the writer finish its in-flight batch; cancelling would leave the
+            # writer thread running on the same files as the final flush below
+            self._wakeup.set()
+            await self._task
+        await self._flush()
+        await asyncio.to_thread(self._close_segments)
+
+    async def _run(self):
+        while self.active:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self._flush()
+            except Exception as e:
+                logger.error(f"Frame recorder flush failed: {e}", exc_info=True)
+
+    async def _flush(self):
+        if not self._pending:
+            return
+        batches, self._pending, self._pending_bytes = self._pending, {}, 0
+        started = time.monotonic()
+        await asyncio.to_thread(self._write, batches)
+        recorder_flush_seconds.observe(time.monotonic() - started)
+
+    def _write(self, batches: Dict[str, List[Tuple[int, bytes]]]):
+        for stream_id, frames in batches.items():
+            segment = self._segments.get(stream_id)
+            if segment is None or segment.size >= self.segment_bytes:
+                if segment is not None:
+                    self._close_segment(segment)
+                directory = os.path.join(self.root, stream_dir_name(stream_id))
+                os.makedirs(directory, exist_ok=True)
+                segment = self._segments[stream_id] = _Segment(directory, frames[0][0])
+            segment.append(frames)
+            recorder_frames_written.inc(len(frames))
+
+        now = time.monotonic()
+        if now - self._last_fsync >= self.fsync_interval:
+            for segment in self._segments.values():
+                segment.fsync()
+            self._last_fsync = now
+
+    def _close_segments(self):
+        for segment in self._segments.values():
+            self._close_segment(segment)
+        self._segments.clear()
+
+    def _close_segment(self, segment: _Segment):
+        segment.close()
+        if self.on_segment_closed is None:
+            return
+        for suffix in (SEGMENT_SUFFIX, INDEX_SUFFIX):
+            path = segment.base + suffix
+            object_name = "recordings/" + os.path.relpath(path, self.root).replace(os.sep, "/")
+            try:
+                self.on_segment_closed(path, object_name)
+            except Exception as e:
+                logger.error(f"Failed to hand off closed segment {path}: {e}")
+
+
+class FrameReplay:
+    """Serves recorded frames by time range straight from memory-mapped segments."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def streams(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(entry.name for entry in os.scandir(self.root) if entry.is_dir())
+
+    def segments(self, stream_id: str) -> List[int]:
+        """First timestamps (ns) of the stream's segments, oldest first."""
+        directory = os.path.join(self.root, stream_dir_name(stream_id))
+        if not os.path.isdir(directory):
+            return []
+        # Anything not named <first_ts>.seg (editor backups, copies, ...) is not a segment
+        stems = (name[:-len(SEGMENT_SUFFIX)] for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+        return sorted(int(stem) for stem in stems if stem.isascii() and stem.isdigit())
+
+    @staticmethod
+    def _map(path: str) -> Optional[mmap.mmap]:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def _first_at_or_after(index: memoryview, count: int, ts: int) -> int:
+        low, high = 0, count
+        while low < high:
+            mid = (low + high) // 2
+            if INDEX_RECORD.unpack_from(index, mid * INDEX_RECORD.size)[0] < ts:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def read_range(self, stream_id: str, start_ns: int, end_ns: int) -> Iterator[Tuple[int, memoryview]]:
+        """
+        Yield (ts_ns, payload) for frames with start_ns <= ts < end_ns.
+
+        Payloads are zero-copy views into the mapped segment; the mapping stays
+        alive for as long as a view references it.
+        """
+        directory = os.path.join(self.root, stream_dir_name(stream_id))
+        firsts = self.segments(stream_id)
+        for i, first_ts in enumerate(firsts):
+            next_first = firsts[i + 1] if i + 1 < len(firsts) else None
+            if first_ts >= end_ns or (next_first is not None and next_first <= start_ns):
+                continue
+
+            base = os.path.join(directory, f"{first_ts:020d}")
+            index_map = self._map(base + INDEX_SUFFIX)  # map the index first: it never runs ahead of the data
+            data_map = self._map(base + SEGMENT_SUFFIX)
+            if index_map is None or data_map is None:
+                continue
+
+            index = memoryview(index_map)
+            data = memoryview(data_map)
+            count = len(index) // INDEX_RECORD.size
+            for position in range(self._first_at_or_after(index, count, start_ns), count):
+                ts, offset, length = INDEX_RECORD.unpack_from(index, position * INDEX_RECORD.size)
+                if ts >= end_ns:
+                    return
+                yield ts, data[offset:offset + length]
+
+
+frame_recorder = FrameRecorder(
+    root=settings.RECORDER_PATH,
+    segment_bytes=settings.RECORDER_SEGMENT_BYTES,
+    flush_interval=settings.RECORDER_FLUSH_INTERVAL_MS / 1000,
+    batch_bytes=settings.RECORDER_BATCH_BYTES,
+    fsync_interval=settings.RECORDER_FSYNC_INTERVAL_SECONDS,
+    max_pending_bytes=settings.RECORDER_MAX_PENDING_BYTES,
+)
+frame_replay = FrameReplay(settings.RECORDER_PATH)
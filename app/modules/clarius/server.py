@@ -1,31 +1,180 @@
 """gRPC server startup and management for Clarius service."""
+import asyncio
 import logging
+import multiprocessing
+import threading
+from contextlib import asynccontextmanager
 
 import grpc
 
+from app.core.setting import settings
+from app.initialize.minio_uploader import minio_uploader
+from app.initialize.websocket import socket_manage
 from app.modules.clarius.config import GRPC_ADDRESS, GRPC_PORT
 from app.modules.clarius.proto import frame_pb2_grpc
+from app.modules.clarius.recorder import frame_recorder
 from app.modules.clarius.servicer import FrameServicer
+from app.modules.clarius.shm_ring import ShmFrameSubscriber
 
 logger = logging.getLogger(__name__)
 
+_COMPRESSION = {
+    "none": grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+}
 
-async def start_grpc_server():
+
+def build_server_options() -> list:
+    """Channel arguments for the frame server, from the GRPC_* settings."""
+    return [
+        ("grpc.max_receive_message_length", settings.GRPC_MAX_RECEIVE_MESSAGE_BYTES),
+        ("grpc.max_send_message_length", settings.GRPC_MAX_SEND_MESSAGE_BYTES),
+        ("grpc.keepalive_time_ms", settings.GRPC_KEEPALIVE_TIME_MS),
+        ("grpc.keepalive_timeout_ms", settings.GRPC_KEEPALIVE_TIMEOUT_MS),
+        ("grpc.keepalive_permit_without_calls", int(settings.GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS)),
+        ("grpc.http2.min_ping_interval_without_data_ms", settings.GRPC_MIN_PING_INTERVAL_MS),
+        ("grpc.max_concurrent_streams", settings.GRPC_MAX_CONCURRENT_STREAMS),
+    ]
+
+
+def create_grpc_server(servicer: FrameServicer) -> grpc.aio.Server:
+    """Build a configured (not yet started) gRPC server with the frame servicer registered."""
+    compression = _COMPRESSION.get(settings.GRPC_COMPRESSION.lower())
+    if compression is None:
+        raise ValueError(f"Unsupported GRPC_COMPRESSION: {settings.GRPC_COMPRESSION}")
+
+    server = grpc.aio.server(
+        options=build_server_options(),
+        maximum_concurrent_rpcs=settings.GRPC_MAXIMUM_CONCURRENT_RPCS,
+        compression=compression,
+    )
+    frame_pb2_grpc.add_FrameServiceServicer_to_server(servicer, server)
+    server.add_insecure_port(GRPC_ADDRESS)
+    return server
+
+
+@asynccontextmanager
+async def recording_lifespan():
+    """
+    Run the frame recorder, and the uploads of its closed segments, on the
+    current loop when RECORDER_ENABLED is set.
+    """
+    if not settings.RECORDER_ENABLED:
+        yield
+        return
+
+    if settings.RECORDER_UPLOAD_ENABLED:
+        await minio_uploader.start()
+        frame_recorder.on_segment_closed = minio_uploader.submit_threadsafe
+    await frame_recorder.start()
+    try:
+        yield
+    finally:
+        await frame_recorder.stop()
+        if minio_uploader.running:
+            await minio_uploader.stop()
+
+
+async def start_grpc_server(servicer: FrameServicer | None = None):
     """
     Start the Clarius gRPC server.
 
     This function initializes and starts the gRPC server on the configured port.
     It should be called as a background task during application startup.
     """
-    server = grpc.aio.server()
+    server = create_grpc_server(servicer or FrameServicer())
+    logger.info(f"Clarius gRPC server starting on port {GRPC_PORT}...")
 
-    # Create and register the servicer
-    servicer = FrameServicer()
-    frame_pb2_grpc.add_FrameServiceServicer_to_server(servicer, server)
+    # The recorder runs on the same loop as the servicer that feeds it
+    async with recording_lifespan():
+        await server.start()
+        try:
+            await server.wait_for_termination()
+        finally:
+            await server.stop(grace=None)
 
-    # Add port and start
-    server.add_insecure_port(GRPC_ADDRESS)
-    logger.info(f"Clarius gRPC server starting on port {GRPC_PORT}...")
 
-    await server.start()
-    await server.wait_for_termination()
+class GrpcServerThread(threading.Thread):
+    """
+    Runs the gRPC server on its own thread and event loop, so frame ingest
+    is not scheduled behind HTTP handlers on the FastAPI loop. Frames are
+    handed back to the FastAPI loop with call_soon_threadsafe.
+
+    grpc.aio polls its completion queue from a single loop, so in this mode
+    the FastAPI loop should not also run grpc.aio channels.
+    """
+
+    def __init__(self, target_loop: asyncio.AbstractEventLoop):
+        super().__init__(name="clarius-grpc", daemon=True)
+        self.loop = asyncio.new_event_loop()
+        self.target_loop = target_loop
+
+    def _publish(self, stream_id: str, data: bytes, received_at: float):
+        self.target_loop.call_soon_threadsafe(socket_manage.publish_frame, stream_id, data, received_at)
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(start_grpc_server(FrameServicer(self._publish)))
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.loop.close()
+
+    def stop(self, timeout: float = 5.0):
+        def cancel_all():
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(cancel_all)
+        self.join(timeout)
+
+
+@asynccontextmanager
+async def grpc_lifespan():
+    """Run the frame server for the lifetime of the app, in the mode set by GRPC_RUN_MODE."""
+    mode = settings.GRPC_RUN_MODE.lower()
+
+    if mode == "thread":
+        grpc_thread = GrpcServerThread(asyncio.get_running_loop())
+        grpc_thread.start()
+        yield
+        await asyncio.to_thread(grpc_thread.stop)
+        logger.info("gRPC server thread stopped")
+
+    elif mode == "inline":
+        grpc_task = asyncio.create_task(start_grpc_server())
+        yield
+        grpc_task.cancel()
+        try:
+            await grpc_task
+        except asyncio.CancelledError:
+            logger.info("gRPC server stopped")
+
+    elif mode == "process":
+        # The ingest process owns the gRPC port; this worker only follows the shared-memory ring
+        ingest = None
+        if settings.GRPC_SPAWN_INGEST_PROCESS:
+            from app.modules.clarius.ingest import run_ingest
+            ingest = multiprocessing.get_context("spawn").Process(
+                target=run_ingest, name="clarius-ingest", daemon=True
+            )
+            ingest.start()
+
+        # Every worker reads the ring itself, so frames are delivered locally, not re-broadcast
+        subscriber = ShmFrameSubscriber(settings.CLARIUS_SHM_NAME, socket_manage.deliver_frame,
+                                        settings.CLARIUS_SHM_POLL_INTERVAL_MS / 1000)
+        reader_task = asyncio.create_task(subscriber.run())
+        yield
+        reader_task.cancel()
+        try:
+            await reader_task
+        except asyncio.CancelledError:
+            logger.info("Frame ring reader stopped")
+        if ingest is not None:
+            ingest.terminate()
+            await asyncio.to_thread(ingest.join, 5.0)
+
+    else:
+        raise ValueError(f"Unsupported GRPC_RUN_MODE: {settings.GRPC_RUN_MODE}")
@@ -1,25 +1,54 @@
 """gRPC servicer implementation for Clarius frame service."""
-import asyncio
 import base64
 import logging
+import time
+from typing import Callable
 
 import grpc
 
+from app.core.metrics import DEFAULT_SIZE_BUCKETS, registry
+from app.modules.clarius.config import DEFAULT_STREAM_ID, STREAM_ACK_INTERVAL
 from app.modules.clarius.proto import frame_pb2, frame_pb2_grpc
+from app.modules.clarius.recorder import frame_recorder
 from app.initialize.websocket import socket_manage
 
 logger = logging.getLogger(__name__)
 
+frames_received = registry.counter(
+    "clarius_frames_received_total", "Frames received over gRPC", ("stream",)
+)
+frame_payload_bytes = registry.histogram(
+    "clarius_frame_payload_bytes", "Size of received frame payloads", buckets=DEFAULT_SIZE_BUCKETS
+)
+
 
 class FrameServicer(frame_pb2_grpc.FrameServiceServicer):
     """Servicer for handling frame data from Clarius."""
 
+    def __init__(self, publish: Callable[[str, bytes, float], None] | None = None):
+        """
+        Args:
+            publish: receives (stream_id, data, received_at) for every frame.
+                Defaults to the in-loop WebSocket fan-out; a server running on
+                another event loop passes a thread-safe handoff instead.
+        """
+        self.publish = publish or socket_manage.publish_frame
+
+    def _dispatch(self, request: frame_pb2.FrameRequest):
+        """Hand a frame to its stream subscribers' send queues without blocking the RPC."""
+        received_at = time.monotonic()
+        stream_id = request.stream_id or DEFAULT_STREAM_ID
+        frames_received.labels(stream_id).inc()
+        frame_payload_bytes.observe(len(request.data))
+        if frame_recorder.active:
+            frame_recorder.record(stream_id, request.data)
+        self.publish(stream_id, request.data, received_at)
+
     async def SendFrame(
             self, request: frame_pb2.FrameRequest, context: grpc.aio.ServicerContext
     ) -> frame_pb2.FrameResponse:
         try:
-            print("Received frame")
-            asyncio.create_task(socket_manage.broadcast_binary(request.data))
+            self._dispatch(request)
             return frame_pb2.FrameResponse()
             # await socket_manage.broadcast_binary(request.data)
             # logger.debug("Frame broadcasted successfully")
@@ -31,6 +60,53 @@ class FrameServicer(frame_pb2_grpc.FrameServiceServicer):
             context.set_details(str(e))
             return frame_pb2.FrameResponse()
 
+    async def StreamFrames(
+            self, request_iterator, context: grpc.aio.ServicerContext
+    ) -> frame_pb2.StreamSummary:
+        """
+        Client-streaming ingest: one long-lived RPC carries every frame of a session.
+
+        Returns:
+            StreamSummary with the number of frames received on the stream
+        """
+        received = 0
+        try:
+            async for request in request_iterator:
+                self._dispatch(request)
+                received += 1
+
+        except Exception as e:
+            logger.error(f"Error processing frame stream: {e}", exc_info=True)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+
+        logger.info(f"Frame stream closed after {received} frames")
+        return frame_pb2.StreamSummary(frames_received=received)
+
+    async def StreamFramesWithAck(self, request_iterator, context: grpc.aio.ServicerContext):
+        """
+        Bidirectional ingest: same as StreamFrames, but yields a FrameAck
+        every STREAM_ACK_INTERVAL frames so the probe can track delivery.
+        """
+        received = 0
+        try:
+            async for request in request_iterator:
+                self._dispatch(request)
+                received += 1
+                if received % STREAM_ACK_INTERVAL == 0:
+                    yield frame_pb2.FrameAck(frames_received=received)
+
+        except Exception as e:
+            logger.error(f"Error processing frame stream: {e}", exc_info=True)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return
+
+        # Final ack so the client always learns the total
+        if received % STREAM_ACK_INTERVAL != 0:
+            yield frame_pb2.FrameAck(frames_received=received)
+        logger.info(f"Frame stream closed after {received} frames")
+
     # async def SendFrame(
     #     self, request: frame_pb2.FrameRequest, context: grpc.aio.ServicerContext
     # ) -> frame_pb2.FrameResponse:
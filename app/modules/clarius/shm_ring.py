@@ -0,0 +1,255 @@
+"""
+Shared-memory frame ring used to hand frames from the ingest process to web workers.
+
+One writer (the gRPC ingest process) copies each frame into a fixed slot of a
+`multiprocessing.shared_memory` segment; any number of readers (uvicorn workers)
+follow the global sequence number and read new slots. Each slot carries its own
+sequence number, used as a seqlock: readers verify it before and after copying
+the payload and discard frames the writer overwrote mid-read.
+
+Layout:
+    header (64 bytes): magic u32 | version u32 | slot_count u32 | slot_size u32 | write_seq u64 | closed u32
+                       | pad | generation u64 (random per created segment, at offset 32)
+    slot:              seq u64 | received_at f64 | length u32 | stream_len u16 | pad
+                       | stream_id (MAX_STREAM_ID_BYTES) | payload (slot_size)
+"""
+import asyncio
+import logging
+import os
+import struct
+import sys
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, List, Optional, Tuple
+
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+MAGIC = 0x434C4652  # "CLFR"
+VERSION = 2
+MAX_STREAM_ID_BYTES = 64
+
+# How often a reader checks whether a restarted writer replaced the segment
+GENERATION_CHECK_INTERVAL = 1.0
+
+_HEADER = struct.Struct("<IIIIQI")
+_HEADER_SIZE = 64
+_WRITE_SEQ = struct.Struct("<Q")
+_WRITE_SEQ_OFFSET = 16
+_CLOSED = struct.Struct("<I")
+_CLOSED_OFFSET = 24
+_GENERATION = struct.Struct("<Q")
+_GENERATION_OFFSET = 32
+_SLOT_HEADER = struct.Struct("<QdIH")
+_SLOT_HEADER_SIZE = 24
+_SLOT_SEQ = struct.Struct("<Q")
+
+Frame = Tuple[str, bytes, float]
+
+shm_frames_read = registry.counter(
+    "clarius_shm_frames_read_total", "Frames read from the shared-memory ring", ("stream",)
+)
+shm_frames_missed = registry.counter(
+    "clarius_shm_frames_missed_total", "Frames overwritten before this worker could read them"
+)
+
+
+def _attach_untracked(name: str) -> shared_memory.SharedMemory:
+    """
+    Open an existing segment without registering it with the resource tracker;
+    otherwise a reader exiting would unlink the writer's segment (bpo-39959).
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class ShmFrameRing:
+    def __init__(self, shm: shared_memory.SharedMemory, slot_count: int, slot_size: int, owner: bool):
+        self.shm = shm
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self.owner = owner
+        self._stride = _SLOT_HEADER_SIZE + MAX_STREAM_ID_BYTES + slot_size
+        self._write_seq = self.write_seq
+
+    @classmethod
+    def create(cls, name: str, slot_count: int, slot_size: int) -> "ShmFrameRing":
+        """Create the segment (replacing a stale one left by a crashed writer)."""
+        try:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+
+        stride = _SLOT_HEADER_SIZE + MAX_STREAM_ID_BYTES + slot_size
+        shm = shared_memory.SharedMemory(name=name, create=True, size=_HEADER_SIZE + slot_count * stride)
+        _HEADER.pack_into(shm.buf, 0, MAGIC, VERSION, slot_count, slot_size, 0, 0)
+        _GENERATION.pack_into(shm.buf, _GENERATION_OFFSET, int.from_bytes(os.urandom(8), "little"))
+        return cls(shm, slot_count, slot_size, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "ShmFrameRing":
+        """Attach to an existing segment; raises FileNotFoundError until the writer has created it."""
+        shm = _attach_untracked(name)
+        magic, version, slot_count, slot_size, _, _ = _HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            shm.close()
+            raise ValueError(f"Shared memory '{name}' is not a frame ring (v{VERSION})")
+        return cls(shm, slot_count, slot_size, owner=False)
+
+    @staticmethod
+    def current_generation(name: str) -> Optional[int]:
+        """Generation of the segment now published under name, or None if there is none."""
+        try:
+            ring = ShmFrameRing.attach(name)
+        except (FileNotFoundError, ValueError):
+            return None
+        try:
+            return ring.generation
+        finally:
+            ring.close()
+
+    @property
+    def generation(self) -> int:
+        return _GENERATION.unpack_from(self.shm.buf, _GENERATION_OFFSET)[0]
+
+    @property
+    def write_seq(self) -> int:
+        return _WRITE_SEQ.unpack_from(self.shm.buf, _WRITE_SEQ_OFFSET)[0]
+
+    @property
+    def closed(self) -> bool:
+        return bool(_CLOSED.unpack_from(self.shm.buf, _CLOSED_OFFSET)[0])
+
+    def _slot_offset(self, seq: int) -> int:
+        return _HEADER_SIZE + ((seq - 1) % self.slot_count) * self._stride
+
+    def write(self, stream_id: str, data: bytes, received_at: float) -> bool:
+        """Copy a frame into the next slot. Returns False if it does not fit."""
+        size = len(data)
+        if size > self.slot_size:
+            logger.warning(f"Frame of {size} bytes exceeds shm slot size {self.slot_size}; dropped")
+            return False
+
+        buf = self.shm.buf
+        seq = self._write_seq + 1
+        offset = self._slot_offset(seq)
+        stream = stream_id.encode("utf-8")
+        if len(stream) > MAX_STREAM_ID_BYTES:
+            # Cut on a character boundary so readers can always decode it
+            stream = stream[:MAX_STREAM_ID_BYTES].decode("utf-8", "ignore").encode("utf-8")
+
+        _SLOT_SEQ.pack_into(buf, offset, 0)  # mark in progress
+        start = offset + _SLOT_HEADER_SIZE
+        buf[start:start + len(stream)] = stream
+        start += MAX_STREAM_ID_BYTES
+        buf[start:start + size] = data
+        _SLOT_HEADER.pack_into(buf, offset, seq, received_at, size, len(stream))
+
+        _WRITE_SEQ.pack_into(buf, _WRITE_SEQ_OFFSET, seq)
+        self._write_seq = seq
+        return True
+
+    def read_since(self, last_seq: int) -> Tuple[int, List[Frame], int]:
+        """
+        Read frames written after last_seq.
+
+        Returns:
+            (new last_seq, frames as (stream_id, data, received_at), frames missed)
+        """
+        write_seq = self.write_seq
+        if write_seq <= last_seq:
+            return write_seq, [], 0
+
+        missed = 0
+        first = last_seq + 1
+        if write_seq - last_seq > self.slot_count:
+            first = write_seq - self.slot_count + 1
+            missed = first - last_seq - 1
+
+        buf = self.shm.buf
+        frames: List[Frame] = []
+        for seq in range(first, write_seq + 1):
+            offset = self._slot_offset(seq)
+            slot_seq, received_at, size, stream_len = _SLOT_HEADER.unpack_from(buf, offset)
+            if slot_seq != seq:
+                missed += 1
+                continue
+            start = offset + _SLOT_HEADER_SIZE
+            stream_id = bytes(buf[start:start + stream_len]).decode("utf-8", "replace")
+            start += MAX_STREAM_ID_BYTES
+            data = bytes(buf[start:start + size])
+            if _SLOT_SEQ.unpack_from(buf, offset)[0] != seq:
+                missed += 1  # overwritten while copying
+                continue
+            frames.append((stream_id, data, received_at))
+
+        return write_seq, frames, missed
+
+    def close(self):
+        if self.owner:
+            _CLOSED.pack_into(self.shm.buf, _CLOSED_OFFSET, 1)
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class ShmFrameSubscriber:
+    """Follows the ring from a web worker and feeds frames into the local fan-out."""
+
+    def __init__(self, name: str, publish: Callable[[str, bytes, float], None], poll_interval: float):
+        self.name = name
+        self.publish = publish
+        self.poll_interval = poll_interval
+
+    async def _attach(self) -> ShmFrameRing:
+        while True:
+            try:
+                ring = ShmFrameRing.attach(self.name)
+                logger.info(f"Attached to frame ring '{self.name}' ({ring.slot_count} slots)")
+                return ring
+            except FileNotFoundError:
+                await asyncio.sleep(1.0)
+
+    async def run(self):
+        while True:
+            try:
+                await self._follow(await self._attach())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Frame ring reader for '{self.name}' failed: {e}; reattaching", exc_info=True)
+                await asyncio.sleep(1.0)
+
+    async def _follow(self, ring: ShmFrameRing):
+        loop = asyncio.get_running_loop()
+        last_seq = ring.write_seq  # start live, don't replay old frames
+        next_check = loop.time() + GENERATION_CHECK_INTERVAL
+        try:
+            while not ring.closed:
+                last_seq, frames, missed = ring.read_since(last_seq)
+                if missed:
+                    shm_frames_missed.inc(missed)
+                for stream_id, data, received_at in frames:
+                    shm_frames_read.labels(stream_id).inc()
+                    self.publish(stream_id, data, received_at)
+
+                # A crashed writer never sets "closed"; its replacement creates a new segment
+                if loop.time() >= next_check:
+                    next_check = loop.time() + GENERATION_CHECK_INTERVAL
+                    generation = ShmFrameRing.current_generation(self.name)
+                    if generation is not None and generation != ring.generation:
+                        logger.warning(f"Frame ring '{self.name}' was recreated by a new writer; reattaching")
+                        return
+                await asyncio.sleep(self.poll_interval)
+            logger.info(f"Frame ring '{self.name}' closed by writer; reattaching")
+        finally:
+            ring.close()
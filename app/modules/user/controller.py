@@ -1,10 +1,11 @@
 import logging
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Security
+from fastapi.security import HTTPAuthorizationCredentials
 
 from app.core.app_status import AppStatus
-from app.middlewares.auth_middleware import AuthMiddleware
+from app.middlewares.auth_middleware import AuthMiddleware, bearer_scheme
 from app.modules.user.dependencies import get_auth_service
 from app.modules.user.schemas import LoginSchema, RegisterSchema, UserUpdateSchema, UserFilterSchema, RefreshTokenSchema
 from app.modules.user.service import AuthService
@@ -27,6 +28,14 @@ async def me(user: AuthMiddleware = Depends(AuthMiddleware.get_current_user)):
     return user
 
 
+@auth_router.post("/logout")
+async def logout(logout_data: RefreshTokenSchema,
+                 credentials: HTTPAuthorizationCredentials = Security(bearer_scheme),
+                 auth_service: AuthService = Depends(get_auth_service)):
+    token = credentials.credentials if credentials else ""
+    return await auth_service.logout(token, logout_data.refresh_token)
+
+
 @auth_router.post("/refresh")
 async def refresh_token(refresh_data: RefreshTokenSchema,
                         auth_service: AuthService = Depends(get_auth_service)):
@@ -37,3 +46,14 @@ async def refresh_token(refresh_data: RefreshTokenSchema,
 @auth_router.get("/producer")
 async def producer(auth_service: AuthService = Depends(get_auth_service)):
     return await auth_service.send_user_created_event()
+
+
+@user_router.get("/list")
+async def list_users(cursor: str | None = None,
+                     limit: int = Query(20, ge=1, le=100),
+                     with_total: bool = False,
+                     _=Depends(AuthMiddleware.is_admin()),
+                     auth_service: AuthService = Depends(get_auth_service)):
+    # Pass back next_cursor from the previous page to get the next one
+    users = await auth_service.get_all_users(limit, cursor, with_total)
+    return handle_response(users)
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from fastapi import Depends
 
 from app.core.setting import settings
@@ -11,9 +13,11 @@ def get_auth_repository(db=Depends(get_session)):
     return AuthRepository(db)
 
 
+@lru_cache(maxsize=1)
 def get_token_service():
     return TokenService(settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM, settings.ACCESS_TOKEN_EXPIRES_IN_MINUTES,
-                        settings.REFRESH_TOKEN_EXPIRES_IN_DAYS)
+                        settings.REFRESH_TOKEN_EXPIRES_IN_DAYS, settings.TOKEN_CACHE_SIZE,
+                        settings.TOKEN_REVOCATION_SYNC_SECONDS)
 
 
 def get_auth_service(auth_repository: AuthRepository = Depends(get_auth_repository),
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, UUID, text
+from sqlalchemy import Column, String, Boolean, DateTime, UUID, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 import uuid
@@ -8,6 +8,8 @@ Base = declarative_base()
 
 class User(Base):
     __tablename__ = "users"
+    # Keyset pagination of active users, newest first (migration 002)
+    __table_args__ = (Index("ix_users_active_created_at_id", "is_active", "created_at", "id"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     username = Column(String(50), unique=True, nullable=False, index=True)
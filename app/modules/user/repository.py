@@ -1,11 +1,40 @@
 import asyncio
+import base64
+import json
 from typing import Tuple, Optional, List
 from uuid import UUID
 
-from sqlalchemy import select, update, func
+from sqlalchemy import String, select, update, func, tuple_, type_coerce
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.kafka.outbox import add_outbox_event
+from app.core.setting import settings
 from app.modules.user.model import User
+from app.utils.cache import TTLCache
+
+# Detached copies of users resolved for authentication, keyed by user id.
+# Per process: writes through AuthRepository invalidate locally, other workers rely on the TTL.
+user_principal_cache = TTLCache(maxsize=settings.AUTH_PRINCIPAL_CACHE_SIZE,
+                                ttl=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS)
+
+# Approximate number of active users; refreshed at most every USER_COUNT_CACHE_TTL_SECONDS
+user_count_cache = TTLCache(maxsize=1, ttl=settings.USER_COUNT_CACHE_TTL_SECONDS)
+
+# created_at compared as stored: SQLite keeps server-default timestamps without microseconds,
+# so a datetime parameter (always rendered with them) would not match a row's own value
+_created_at_key = type_coerce(User.created_at, String)
+
+
+def encode_user_cursor(created_at_key: str, user_id: UUID) -> str:
+    raw = json.dumps([created_at_key, str(user_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_user_cursor(cursor: str) -> Tuple[str, UUID]:
+    """Raises ValueError for a malformed cursor."""
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    created_at_key, user_id = json.loads(raw)
+    return str(created_at_key), UUID(user_id)
 
 
 class AuthRepository:
@@ -30,15 +59,38 @@ class AuthRepository:
         result = await self.db.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def find_user_principal(self, user_id: UUID) -> Optional[User]:
+        """Find user by UUID for authentication, served from the principal cache when possible"""
+        principal = user_principal_cache.get(user_id)
+        if principal is not None:
+            return principal
+
+        user = await self.find_user_by_id(user_id)
+        if user is None:
+            return None
+        # A transient copy: never attached to (or expired by) any request's session
+        principal = User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+        user_principal_cache.set(user_id, principal)
+        return principal
+
     async def create_user(self, user_data: dict) -> User:
-        """Create new user"""
+        """Create new user and, in the same transaction, its user_created outbox event"""
         user = User(**user_data)
         self.db.add(user)
         await self.db.flush()
         await self.db.refresh(user)
+        add_outbox_event(self.db, settings.KAFKA_USER_EVENTS_TOPIC,
+                         {"event": "user_created", "user_id": str(user.id)}, key=str(user.id))
         await self.db.commit()
+        user_count_cache.clear()
         return user
 
+    async def add_event(self, topic: str, payload: dict, key: Optional[str] = None) -> str:
+        """Commit a standalone outbox event"""
+        event_id = add_outbox_event(self.db, topic, payload, key)
+        await self.db.commit()
+        return event_id
+
     async def get_all_users(self, skip: int, limit: int) -> List[User]:
         """Get paginated users without count"""
         stmt = select(User).where(User.is_active == True).order_by(User.created_at.desc()).offset(skip).limit(limit)
@@ -71,6 +123,38 @@ class AuthRepository:
         users = data_result.scalars().all()
         return users, total
 
+    async def get_users_page(self, limit: int, cursor: Optional[str] = None) -> Tuple[List[User], Optional[str]]:
+        """
+        Keyset page of active users, newest first, ordered by (created_at, id).
+        Returns the users and the cursor of the next page (None on the last page).
+        """
+        stmt = (
+            select(User, _created_at_key.label("created_at_key"))
+            .where(User.is_active.is_(True))
+            .order_by(User.created_at.desc(), User.id.desc())
+            .limit(limit + 1)
+        )
+        if cursor:
+            created_at_key, user_id = decode_user_cursor(cursor)
+            stmt = stmt.where(tuple_(_created_at_key, User.id) < tuple_(created_at_key, user_id))
+
+        rows = (await self.db.execute(stmt)).all()
+        users = [user for user, _ in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last_user, last_key = rows[limit - 1]
+            next_cursor = encode_user_cursor(last_key, last_user.id)
+        return users, next_cursor
+
+    async def count_active_users(self) -> int:
+        """Active user count, served from a short-lived cache instead of a full scan per request"""
+        total = user_count_cache.get("active")
+        if total is None:
+            result = await self.db.execute(select(func.count(User.id)).where(User.is_active.is_(True)))
+            total = result.scalar()
+            user_count_cache.set("active", total)
+        return total
+
     async def update_user(self, user_id: UUID, user_data: dict) -> Optional[User]:
         """Update user by ID"""
         stmt = update(User).where(User.id == user_id).values(**user_data).returning(User)
@@ -79,6 +163,7 @@ class AuthRepository:
         if updated_user:
             await self.db.refresh(updated_user)
             await self.db.commit()
+        user_principal_cache.pop(user_id)
         return updated_user
 
     async def delete_user(self, user_id: UUID) -> Optional[UUID]:
@@ -86,4 +171,6 @@ class AuthRepository:
         stmt = update(User).where(User.id == user_id).values(is_active=False).returning(User.id)
         result = await self.db.execute(stmt)
         await self.db.commit()
+        user_principal_cache.pop(user_id)
+        user_count_cache.clear()
         return result.scalar_one_or_none()
@@ -2,9 +2,9 @@ import logging
 from uuid import UUID
 
 from app.core.app_status import AppStatus
-from app.core.kafka import kafka_producer
+from app.core.kafka.outbox import outbox_relay
 from app.modules.user.schemas import RegisterSchema, UserUpdateSchema
-from app.utils.hasher import hash_password, verify_password
+from app.utils.hasher import hash_password_async, verify_password_async
 from app.utils.response import error_exception_handler, handle_response
 
 logger = logging.getLogger(__name__)
@@ -18,16 +18,27 @@ class AuthService:
     async def login(self, email, password):
         user = await self.user_repository.find_user_by_email(email)
 
-        if not user or not verify_password(password, user.password):
+        if not user or not await verify_password_async(password, user.password):
             logger.info("AuthService.login - Invalid login attempt for username: %s", email)
             raise error_exception_handler(app_status=AppStatus.ERROR_LOGIN_INVALID)
         if user.is_active is False:
             raise error_exception_handler(app_status=AppStatus.ERROR_USER_INACTIVE)
         return self.token_service.generate_token_pair(user)
 
+    async def logout(self, token: str, refresh_token: str):
+        """Revoke the presented access token and the refresh token issued with it"""
+        access_claims = await self.token_service.verify_token(token)
+        refresh_claims = await self.token_service.verify_token(refresh_token)
+        if (not access_claims or not refresh_claims or "jti" not in access_claims or "jti" not in refresh_claims
+                or access_claims.get("sub") != refresh_claims.get("sub")):
+            raise error_exception_handler(app_status=AppStatus.UNAUTHORIZED)
+
+        await self.token_service.revoke_claims(access_claims, refresh_claims)
+        return handle_response(app_status=AppStatus.LOGOUT_SUCCESS)
+
     async def refresh_token(self, refresh_token: str):
         """Refresh access token using refresh token"""
-        claims = self.token_service.validate_token(refresh_token)
+        claims = await self.token_service.verify_token(refresh_token)
         if not claims:
             raise error_exception_handler(app_status=AppStatus.UNAUTHORIZED)
         
@@ -43,21 +54,28 @@ class AuthService:
             raise error_exception_handler(app_status=AppStatus.ERROR_USER_ALREADY_EXISTS)
 
         user_data = param.model_dump(exclude_unset=True, exclude_none=True)
-        user_data["password"] = hash_password(param.password)
+        user_data["password"] = await hash_password_async(param.password)
 
         user = await self.user_repository.create_user(user_data)
+        outbox_relay.notify()
         return user
 
-    async def get_all_users(self, skip: int, limit: int):
-        logger.info("AuthService.login - Get all users")
-        users, total = await self.user_repository.get_users_with_count(skip, limit)
+    async def get_all_users(self, limit: int, cursor: str | None = None, with_total: bool = False):
+        logger.info("AuthService.get_all_users - Get users page")
+        try:
+            users, next_cursor = await self.user_repository.get_users_page(limit, cursor)
+        except ValueError:
+            raise error_exception_handler(app_status=AppStatus.BAD_REQUEST)
+
+        # The total is optional and approximate (cached), so paging never pays for a full count
+        total = await self.user_repository.count_active_users() if with_total else None
         users_dict = [user.to_dict() for user in users]
-        return {"total": total, "users": users_dict}
+        return {"total": total, "users": users_dict, "next_cursor": next_cursor}
 
     async def update_user(self, user_id: UUID, user_data: UserUpdateSchema):
         data = user_data.model_dump(exclude_unset=True, exclude_none=True)
         if data.get("password"):
-            data["password"] = hash_password(data["password"])
+            data["password"] = await hash_password_async(data["password"])
 
         result = await self.user_repository.update_user(user_id, data)
         return result
@@ -73,7 +91,10 @@ class AuthService:
             "event": "user_created",
             "user_id": "testtt"
         }
-        await kafka_producer.send_message("demo", payload)
+        # Committed locally first; the outbox relay delivers it once Kafka is reachable
+        event_id = await self.user_repository.add_event("demo", payload)
+        outbox_relay.notify()
+        return handle_response({"event_id": event_id})
 
     async def receive_messages(self, data):
         logging.info(f"[SERVICE] Received message: {data}")
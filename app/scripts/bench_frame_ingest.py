@@ -0,0 +1,83 @@
+"""
+Benchmark Clarius frame ingest: unary SendFrame vs StreamFrames vs StreamFramesWithAck.
+
+Usage:
+    python -m app.scripts.bench_frame_ingest --frames 5000 --size 65536
+"""
+import argparse
+import asyncio
+import time
+
+import grpc
+
+from app.modules.clarius.proto import frame_pb2, frame_pb2_grpc
+from app.modules.clarius.servicer import FrameServicer
+
+
+async def bench_unary(stub, frames: int, payload: bytes) -> float:
+    start = time.perf_counter()
+    for _ in range(frames):
+        await stub.SendFrame(frame_pb2.FrameRequest(data=payload))
+    return time.perf_counter() - start
+
+
+async def bench_stream(stub, frames: int, payload: bytes) -> float:
+    async def requests():
+        for _ in range(frames):
+            yield frame_pb2.FrameRequest(data=payload)
+
+    start = time.perf_counter()
+    summary = await stub.StreamFrames(requests())
+    elapsed = time.perf_counter() - start
+    assert summary.frames_received == frames
+    return elapsed
+
+
+async def bench_stream_ack(stub, frames: int, payload: bytes) -> float:
+    async def requests():
+        for _ in range(frames):
+            yield frame_pb2.FrameRequest(data=payload)
+
+    start = time.perf_counter()
+    last = 0
+    async for ack in stub.StreamFramesWithAck(requests()):
+        last = ack.frames_received
+    elapsed = time.perf_counter() - start
+    assert last == frames
+    return elapsed
+
+
+async def run(frames: int, size: int):
+    options = [
+        ("grpc.max_receive_message_length", size + 1024),
+        ("grpc.max_send_message_length", size + 1024),
+    ]
+    server = grpc.aio.server(options=options)
+    frame_pb2_grpc.add_FrameServiceServicer_to_server(FrameServicer(), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+
+    payload = b"\x00" * size
+    async with grpc.aio.insecure_channel(f"127.0.0.1:{port}", options=options) as channel:
+        stub = frame_pb2_grpc.FrameServiceStub(channel)
+
+        unary = await bench_unary(stub, frames, payload)
+        stream = await bench_stream(stub, frames, payload)
+        stream_ack = await bench_stream_ack(stub, frames, payload)
+
+    await server.stop(None)
+
+    print(f"frames={frames} size={size} bytes")
+    for name, elapsed in (("SendFrame (unary)", unary),
+                          ("StreamFrames", stream),
+                          ("StreamFramesWithAck", stream_ack)):
+        print(f"{name:<22} {frames / elapsed:>10.0f} frames/sec  ({elapsed:.3f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare unary and streaming frame ingest")
+    parser.add_argument("--frames", type=int, default=5000, help="Frames per run")
+    parser.add_argument("--size", type=int, default=64 * 1024, help="Frame payload size in bytes")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.frames, args.size))
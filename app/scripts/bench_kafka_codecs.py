@@ -0,0 +1,101 @@
+"""
+Kafka payload codecs: encode / decode cost and payload size per codec.
+
+Covers a small domain event and a device telemetry record (the high-volume
+case), then publishes telemetry through KafkaProducer with each codec against
+the in-process broker stand-in (app.scripts.fake_kafka_broker).
+Codecs whose optional library is missing are skipped.
+
+Usage:
+    python -m app.scripts.bench_kafka_codecs --iterations 50000 --events 20000
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.kafka import codecs
+from app.core.kafka.codecs import TopicCodecs, get_codec
+from app.core.kafka.producer import KafkaProducer
+from app.core.kafka.proto.telemetry_pb2 import DeviceTelemetry
+from app.scripts.fake_kafka_broker import FakeKafkaBroker
+
+TOPIC = "bench-telemetry"
+TELEMETRY = "protobuf:edge.kafka.DeviceTelemetry"
+
+
+def make_event(i: int) -> dict:
+    return {"event": "user_created", "user_id": f"user-{i}", "email": f"user{i}@example.com", "seq": i}
+
+
+def make_telemetry(i: int) -> dict:
+    return {
+        "device_id": f"probe-{i % 64}",
+        "event": "telemetry",
+        "timestamp_ms": 1_760_000_000_000 + i,
+        "metrics": {f"sensor_{n}": i * 0.001 + n for n in range(16)},
+        "status": "ok",
+    }
+
+
+def available_specs():
+    specs = ["json"]
+    for name, module in (("orjson", codecs.orjson), ("msgpack", codecs.msgpack)):
+        if module is not None:
+            specs.append(name)
+        else:
+            print(f"(skipping {name}: pip install {name})")
+    return specs
+
+
+def time_per_op(func, value, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(value)
+    return (time.perf_counter() - start) / iterations
+
+
+def bench_cpu(specs, iterations: int):
+    cases = [("event", spec, make_event(7)) for spec in specs]
+    cases += [("telemetry", spec, make_telemetry(7)) for spec in specs]
+    cases.append(("telemetry", TELEMETRY, make_telemetry(7)))
+    cases.append(("telemetry", TELEMETRY + " (msg)", DeviceTelemetry(**make_telemetry(7))))
+
+    print(f"{'payload':<10} {'codec':<42} {'encode':>10} {'decode':>10} {'bytes':>7}")
+    for payload, label, value in cases:
+        codec = get_codec(label.split(" ")[0])
+        data = codec.encode(value)
+        encode = time_per_op(codec.encode, value, iterations)
+        decode = time_per_op(codec.decode, data, iterations)
+        print(f"{payload:<10} {label:<42} {encode * 1e6:>7.2f} us {decode * 1e6:>7.2f} us {len(data):>7}")
+
+
+async def bench_publish(specs, events: int):
+    broker = FakeKafkaBroker(port=0, latency=0.001)
+    await broker.start()
+
+    print(f"\npublish_many of {events} telemetry records")
+    for spec in specs + [TELEMETRY]:
+        # KafkaProducer is a process-wide singleton: reset it so every run gets its own codec
+        KafkaProducer._instance = None
+        producer = KafkaProducer(broker.bootstrap, linger_ms=5, codecs=TopicCodecs("json", {TOPIC: spec}))
+        await producer.start()
+        messages = [make_telemetry(i) for i in range(events)]
+        before = broker.records[TOPIC]
+        start = time.perf_counter()
+        await asyncio.gather(*await producer.publish_many(TOPIC, messages, key=lambda m: m["device_id"]))
+        elapsed = time.perf_counter() - start
+        await producer.stop()
+        assert broker.records[TOPIC] - before == events
+        print(f"{spec:<42} {events / elapsed:>10.0f} events/s")
+
+    await broker.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50000)
+    parser.add_argument("--events", type=int, default=20000)
+    args = parser.parse_args()
+    specs = available_specs()
+    bench_cpu(specs, args.iterations)
+    asyncio.run(bench_publish(specs, args.events))
@@ -0,0 +1,126 @@
+"""
+Outbox behaviour through a broker outage and a relay restart.
+
+Commits events to a throwaway SQLite outbox at a steady rate while the relay
+drains them to the broker stand-in (app.scripts.fake_kafka_broker). Midway the
+broker goes down for --outage-seconds and, later, the relay is restarted.
+--relays runs several relays on the same database, like one per uvicorn
+worker; only the lease holder publishes and the restart hands the lease over.
+Reports commit latency (which should not notice the outage), how long the
+backlog took to drain, and whether any event was lost or duplicated.
+
+Usage:
+    python -m app.scripts.bench_kafka_outbox --rate 500 --seconds 12 --outage-seconds 4 --relays 4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.kafka.outbox import EVENT_ID_HEADER, OutboxRelay, add_outbox_event
+from app.core.kafka.producer import KafkaProducer
+from app.initialize import database
+from app.modules.user.model import Base
+from app.scripts.fake_kafka_broker import FakeKafkaBroker
+
+TOPIC = "outbox-bench"
+
+
+def new_relay(broker: FakeKafkaBroker) -> OutboxRelay:
+    KafkaProducer._instance = None
+    producer = KafkaProducer(broker.bootstrap, request_timeout_ms=10000)
+    return OutboxRelay(producer, batch_size=500, poll_interval=0.05, retry_base=0.2, retry_max=1.0,
+                       lease_seconds=20.0)
+
+
+async def write_events(rate: int, seconds: float, relays: list, latencies: list) -> list:
+    event_ids = []
+    interval = 1 / rate
+    deadline = time.perf_counter() + seconds
+    next_at = time.perf_counter()
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        async with database.AsyncSessionLocal() as session:
+            event_ids.append(add_outbox_event(session, TOPIC, {"seq": len(event_ids)}, key=str(len(event_ids) % 8)))
+            await session.commit()
+        latencies.append(time.perf_counter() - started)
+        for relay in relays:
+            relay.notify()
+        next_at += interval
+        await asyncio.sleep(max(next_at - time.perf_counter(), 0))
+    return event_ids
+
+
+async def stop_relay(relay: OutboxRelay):
+    await relay.stop()
+    await relay.producer.stop()
+
+
+async def run(rate: int, seconds: float, outage: float, relay_count: int):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(directory, 'outbox.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        database.AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        broker = FakeKafkaBroker(port=0, latency=0.002, keep_records=True)
+        await broker.start()
+        relays = [new_relay(broker) for _ in range(relay_count)]
+        for relay in relays:
+            await relay.start()
+
+        latencies = []
+        writer = asyncio.create_task(write_events(rate, seconds, relays, latencies))
+
+        await asyncio.sleep(seconds * 0.25)
+        print(f"t={seconds * 0.25:.1f}s broker down")
+        await broker.stop()
+        await asyncio.sleep(outage)
+        print(f"t={seconds * 0.25 + outage:.1f}s broker up")
+        await broker.start()
+
+        await asyncio.sleep(seconds * 0.75 - outage - 1)
+        # Restart every relay one after another, so the lease changes hands while events keep coming
+        print("relay restart")
+        for i, relay in enumerate(relays):
+            await stop_relay(relay)
+            relays[i] = new_relay(broker)
+            await relays[i].start()
+
+        event_ids = await writer
+        written_at = time.perf_counter()
+        pending = set(event_ids)
+        while pending and time.perf_counter() - written_at < 30:
+            pending.difference_update(dict(headers)[EVENT_ID_HEADER].decode() for _, _, _, headers in broker.received)
+            await asyncio.sleep(0.05)
+        drain = time.perf_counter() - written_at
+
+        for relay in relays:
+            await stop_relay(relay)
+        await broker.stop()
+        await engine.dispose()
+
+    delivered = [dict(headers)[EVENT_ID_HEADER].decode() for _, _, _, headers in broker.received]
+    latencies_ms = sorted(value * 1000 for value in latencies)
+    print(f"relays               {relay_count}")
+    print(f"events committed     {len(event_ids)}")
+    print(f"commit latency       p50 {statistics.median(latencies_ms):.2f} ms, "
+          f"p99 {latencies_ms[int(len(latencies_ms) * 0.99) - 1]:.2f} ms, max {latencies_ms[-1]:.2f} ms")
+    print(f"backlog drained in   {drain:.2f} s after the last commit")
+    print(f"lost                 {len(set(event_ids) - set(delivered))}")
+    print(f"duplicated           {len(delivered) - len(set(delivered))} "
+          f"(broker dropped {broker.duplicate_batches} resent batches)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=int, default=500, help="events committed per second")
+    parser.add_argument("--seconds", type=float, default=12.0)
+    parser.add_argument("--outage-seconds", type=float, default=4.0)
+    parser.add_argument("--relays", type=int, default=1, help="relays sharing the outbox (one per worker)")
+    args = parser.parse_args()
+    asyncio.run(run(args.rate, args.seconds, args.outage_seconds, args.relays))
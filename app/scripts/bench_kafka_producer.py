@@ -0,0 +1,92 @@
+"""
+Kafka producer throughput: send_and_wait per event vs publish / publish_many.
+
+Runs against the in-process broker stand-in (app.scripts.fake_kafka_broker)
+with a simulated round-trip latency, so the numbers show the cost of waiting
+on the broker per event rather than broker throughput.
+
+Usage:
+    python -m app.scripts.bench_kafka_producer --events 20000 --latency-ms 2
+"""
+import argparse
+import asyncio
+import time
+
+from aiokafka import codec as kafka_codec
+
+from app.core.kafka.producer import KafkaProducer
+from app.scripts.fake_kafka_broker import FakeKafkaBroker
+
+TOPIC = "bench"
+
+
+def make_event(i: int) -> dict:
+    return {"event": "user_created", "user_id": f"user-{i}", "email": f"user{i}@example.com", "seq": i}
+
+
+def new_producer(broker: FakeKafkaBroker, compression: str, linger_ms: int) -> KafkaProducer:
+    # KafkaProducer is a process-wide singleton: reset it so every run gets its own config
+    KafkaProducer._instance = None
+    return KafkaProducer(broker.bootstrap, linger_ms=linger_ms, compression=compression)
+
+
+def codec_available(codec: str) -> bool:
+    return getattr(kafka_codec, f"has_{codec}")()
+
+
+async def send_and_wait(producer: KafkaProducer, events: int, concurrency: int):
+    async def worker(start: int):
+        for i in range(start, events, concurrency):
+            await producer.send_message(TOPIC, make_event(i))
+
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+
+
+async def publish(producer: KafkaProducer, events: int, concurrency: int):
+    futures = [await producer.publish(TOPIC, make_event(i), key=i) for i in range(events)]
+    await asyncio.gather(*futures)
+
+
+async def publish_many(producer: KafkaProducer, events: int, concurrency: int):
+    futures = await producer.publish_many(TOPIC, (make_event(i) for i in range(events)), key=lambda e: e["seq"])
+    await asyncio.gather(*futures)
+
+
+async def run(events: int, latency_ms: float, concurrency: int):
+    broker = FakeKafkaBroker(port=0, latency=latency_ms / 1000)
+    await broker.start()
+
+    cases = [
+        ("send_and_wait", send_and_wait, "none", 0, min(events, 2000)),
+        ("publish", publish, "none", 5, events),
+        ("publish_many", publish_many, "none", 5, events),
+        ("publish_many gzip", publish_many, "gzip", 5, events),
+    ]
+    for codec in ("lz4", "zstd"):
+        if codec_available(codec):
+            cases.append((f"publish_many {codec}", publish_many, codec, 5, events))
+        else:
+            print(f"(skipping {codec}: install aiokafka[{codec}])")
+
+    print(f"broker round-trip {latency_ms} ms, {concurrency} concurrent senders for send_and_wait")
+    for label, func, compression, linger_ms, count in cases:
+        producer = new_producer(broker, compression, linger_ms)
+        await producer.start()
+        before = broker.records[TOPIC]
+        start = time.perf_counter()
+        await func(producer, count, concurrency)
+        elapsed = time.perf_counter() - start
+        await producer.stop()
+        assert broker.records[TOPIC] - before == count
+        print(f"{label:<20} {count / elapsed:>10.0f} events/s   ({broker.requests[0]} produce requests so far)")
+
+    await broker.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.events, args.latency_ms, args.concurrency))
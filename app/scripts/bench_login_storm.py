@@ -0,0 +1,78 @@
+"""
+Frame delivery latency during a login storm: bcrypt on the event loop vs the hasher pool.
+
+A ticker stands in for the frame stream (one "frame" every --frame-interval-ms)
+and records how late each tick fires while --logins concurrent password
+verifications run on the same loop.
+
+Usage:
+    python -m app.scripts.bench_login_storm --logins 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi import HTTPException
+
+from app.utils.hasher import hash_password, password_hasher_pool, verify_password, verify_password_async
+
+
+async def frame_ticker(interval: float, lateness: list, stop: asyncio.Event):
+    expected = time.perf_counter() + interval
+    while not stop.is_set():
+        await asyncio.sleep(max(expected - time.perf_counter(), 0))
+        lateness.append(time.perf_counter() - expected)
+        expected += interval
+
+
+async def inline_login(password: str, hashed: str):
+    # The previous behaviour: bcrypt called directly inside the handler
+    return verify_password(password, hashed)
+
+
+async def run(mode: str, logins: int, interval: float, hashed: str) -> dict:
+    lateness, stop = [], asyncio.Event()
+    ticker = asyncio.create_task(frame_ticker(interval, lateness, stop))
+    await asyncio.sleep(interval * 5)
+
+    login = inline_login if mode == "inline" else verify_password_async
+    start = time.perf_counter()
+    results = await asyncio.gather(*(login("123123", hashed) for _ in range(logins)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await ticker
+    rejected = sum(isinstance(r, HTTPException) for r in results)
+    lateness_ms = sorted(value * 1000 for value in lateness)
+    return {
+        "elapsed": elapsed,
+        "accepted": logins - rejected,
+        "rejected": rejected,
+        "p50": statistics.median(lateness_ms),
+        "p99": lateness_ms[int(len(lateness_ms) * 0.99) - 1],
+        "max": lateness_ms[-1],
+    }
+
+
+async def main(logins: int, interval_ms: float):
+    interval = interval_ms / 1000
+    hashed = hash_password("123123")
+    # Warm the pool so worker start-up is not counted against the first logins
+    await verify_password_async("123123", hashed)
+
+    print(f"{logins} concurrent logins, one frame every {interval_ms} ms")
+    print(f"{'mode':<8} {'logins/s':>9} {'rejected':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for mode in ("inline", "pool"):
+        r = await run(mode, logins, interval, hashed)
+        print(f"{mode:<8} {r['accepted'] / r['elapsed']:>9.1f} {r['rejected']:>9} "
+              f"{r['p50']:>8.2f} {r['p99']:>8.2f} {r['max']:>8.2f}")
+    password_hasher_pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--frame-interval-ms", type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.frame_interval_ms))
@@ -0,0 +1,79 @@
+"""
+Requests/sec on /api/user/me with and without the verified-token cache.
+
+Runs the real auth router in-process over ASGI. The user lookup is served by
+a stub repository so only token handling and request dispatch are measured.
+validate_token is also timed on its own, since request dispatch dominates /me.
+
+Usage:
+    python -m app.scripts.bench_token_cache --requests 5000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.setting import settings
+from app.modules.auth.security import TokenService
+from app.modules.user.controller import auth_router
+from app.modules.user.dependencies import get_auth_repository, get_token_service
+from app.modules.user.model import User
+
+
+class StubRepository:
+    def __init__(self, user: User):
+        self.user = user
+
+    async def find_user_principal(self, user_id):
+        return self.user
+
+
+def build_app(token_service: TokenService, user: User) -> FastAPI:
+    app = FastAPI()
+    app.include_router(auth_router, prefix="/api/user")
+    app.dependency_overrides[get_token_service] = lambda: token_service
+    app.dependency_overrides[get_auth_repository] = lambda: StubRepository(user)
+    return app
+
+
+async def run(label: str, cache_size: int, user: User, requests: int, concurrency: int):
+    token_service = TokenService(settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM, 60,
+                                 settings.REFRESH_TOKEN_EXPIRES_IN_DAYS, cache_size)
+    headers = {"Authorization": f"Bearer {token_service.generate_access_token(user)}"}
+    transport = httpx.ASGITransport(app=build_app(token_service, user))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(count: int):
+            for _ in range(count):
+                response = await client.get("/api/user/me", headers=headers)
+                assert response.status_code == 200, response.text
+
+        await worker(10)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    validations = requests * 10
+    start = time.perf_counter()
+    for _ in range(validations):
+        token_service.validate_token(headers["Authorization"][7:])
+    per_call = (time.perf_counter() - start) / validations
+
+    print(f"{label:<14} {requests / elapsed:>10.0f} req/s   validate_token {per_call * 1e6:>7.2f} us")
+
+
+async def main(requests: int, concurrency: int):
+    user = User(id=uuid.uuid4(), username="bench", email="bench@example.com", role="USER", is_active=True)
+    await run("no cache", 0, user, requests, concurrency)
+    await run("token cache", settings.TOKEN_CACHE_SIZE or 10000, user, requests, concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
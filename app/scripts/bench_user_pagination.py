@@ -0,0 +1,107 @@
+"""
+User listing latency: OFFSET/LIMIT + COUNT(*) vs keyset pagination on (created_at, id).
+
+Builds a throwaway SQLite database with --users synthetic active users (the
+schema, including ix_users_active_created_at_id, comes from the models) and
+times the first page and a deep page with both strategies.
+
+Usage:
+    python -m app.scripts.bench_user_pagination --users 1000000
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.modules.user.model import Base
+from app.modules.user.repository import AuthRepository, user_count_cache
+
+
+def populate(path: str, users: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    start = datetime(2024, 1, 1)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    batch = 50_000
+    for offset in range(0, users, batch):
+        rows = []
+        for i in range(offset, min(offset + batch, users)):
+            # Several users per second, like server-default timestamps (no microseconds)
+            created_at = (start + timedelta(seconds=i // 3)).strftime("%Y-%m-%d %H:%M:%S")
+            rows.append((uuid.uuid4().hex, f"user{i}", "x", f"user{i}@example.com", "USER", 1, created_at, created_at))
+        conn.executemany(
+            "INSERT INTO users (id, username, password, email, role, is_active, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+async def timed(label: str, func, rounds: int = 5):
+    await func()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await func()
+    print(f"{label:<40} {(time.perf_counter() - start) / rounds * 1000:>9.2f} ms")
+
+
+async def run(path: str, users: int, limit: int, depth: float):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    deep_offset = int(users * depth)
+
+    async with sessions() as session:
+        repo = AuthRepository(session)
+
+        # Walk to the deep page once to get its cursor (not timed)
+        cursor, walked = None, 0
+        while walked < deep_offset:
+            page, cursor = await repo.get_users_page(min(5000, deep_offset - walked), cursor)
+            walked += len(page)
+
+        await timed("offset: first page + COUNT(*)", lambda: repo.get_users_with_count(0, limit))
+        await timed(f"offset: page at {deep_offset} + COUNT(*)", lambda: repo.get_users_with_count(deep_offset, limit))
+        await timed("keyset: first page", lambda: repo.get_users_page(limit))
+        await timed(f"keyset: page at {deep_offset}", lambda: repo.get_users_page(limit, cursor))
+
+        async def cached_count():
+            return await repo.count_active_users()
+
+        user_count_cache.clear()
+        await timed("cached count (after first miss)", cached_count)
+
+        offset_page, _ = await repo.get_users_with_count(deep_offset, limit)
+        keyset_page, _ = await repo.get_users_page(limit, cursor)
+        assert [u.id for u in offset_page] == [u.id for u in keyset_page], "pagination strategies disagree"
+
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--depth", type=float, default=0.9, help="deep page position as a fraction of all users")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench_users.db")
+        started = time.perf_counter()
+        populate(path, args.users)
+        print(f"populated {args.users} users in {time.perf_counter() - started:.1f} s")
+        asyncio.run(run(path, args.users, args.limit, args.depth))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Micro-benchmark for WebSocket JSON broadcast: per-socket encoding vs serialize-once.
+
+Usage:
+    python -m app.scripts.bench_ws_broadcast --sockets 100 --payload-kb 500
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import time
+
+from app.initialize.websocket import ConnectionManager, orjson
+
+
+class NullWebSocket:
+    """Accepts every send immediately so only encoding/dispatch cost is measured."""
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        pass
+
+    async def send_bytes(self, data: bytes):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def legacy_broadcast(manager: ConnectionManager, message: dict):
+    """The previous behaviour: json.dumps once per socket, sent sequentially."""
+    for client in list(manager.clients.values()):
+        await client.websocket.send_text(json.dumps(message))
+
+
+async def timed(label: str, rounds: int, func, *args):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await func(*args)
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"{label:<30} {elapsed * 1000:>9.2f} ms/broadcast")
+
+
+async def run(sockets: int, payload_kb: int, rounds: int):
+    image = base64.b64encode(os.urandom(payload_kb * 1024 * 3 // 4)).decode("ascii")
+    message = {"image": image}
+
+    backends = ["json"] + (["orjson"] if orjson is not None else [])
+    print(f"sockets={sockets} payload={len(image) // 1024} KB rounds={rounds}")
+
+    for backend in backends:
+        manager = ConnectionManager(json_backend=backend)
+        for i in range(sockets):
+            await manager.connect(NullWebSocket(), f"user-{i}")
+
+        if backend == "json":
+            await timed("legacy (dumps per socket)", rounds, legacy_broadcast, manager, message)
+        await timed(f"broadcast [{backend}]", rounds, manager.broadcast, message)
+        if backend == "json":
+            await timed("broadcast_base64", rounds, manager.broadcast_base64, image)
+
+        for ws in list(manager.clients):
+            manager.disconnect(ws)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark WebSocket JSON broadcast encoding")
+    parser.add_argument("--sockets", type=int, default=100, help="Simulated sockets")
+    parser.add_argument("--payload-kb", type=int, default=500, help="Payload size in KB")
+    parser.add_argument("--rounds", type=int, default=20, help="Broadcasts per measurement")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.sockets, args.payload_kb, args.rounds))
@@ -0,0 +1,127 @@
+"""
+End-to-end check of the background MinIO uploader against the in-process
+S3 stand-in (app.scripts.fake_minio).
+
+Checks that:
+  - a large file is uploaded on its own (multipart) and small files are bundled into one tar,
+  - injected write failures are retried until the uploads succeed,
+  - every upload is marked done in the persistent queue,
+  - an upload still in flight when stop() is called finishes and is marked done.
+
+Usage:
+    python -m app.scripts.check_minio_uploader
+"""
+import argparse
+import asyncio
+import io
+import os
+import tarfile
+import tempfile
+import time
+from types import SimpleNamespace
+
+from minio import Minio
+
+from app.initialize.minio_uploader import MinIOUploader, UploadQueue
+from app.scripts.fake_minio import FakeMinIO
+
+BUCKET = "edge-check"
+PART_SIZE = 5 * 1024 * 1024  # smallest part size S3 allows
+
+
+def new_uploader(fake: FakeMinIO, queue_path: str) -> MinIOUploader:
+    uploader = MinIOUploader(queue_path=queue_path, concurrency=2, max_attempts=5, retry_base=0.1,
+                             retry_max=0.5, batch_threshold=1024 * 1024, batch_max_bytes=8 * 1024 * 1024,
+                             batch_prefix="batches", part_size=PART_SIZE, delete_local=False)
+    client = Minio(fake.endpoint, access_key="check", secret_key="check-secret", secure=False)
+    if not client.bucket_exists(BUCKET):
+        client.make_bucket(BUCKET)
+    # Stands in for MinIOConfig, which would connect to MINIO_ENDPOINT
+    uploader._minio = SimpleNamespace(client=client, bucket_name=BUCKET)
+    return uploader
+
+
+def write_file(directory: str, name: str, size: int) -> str:
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(os.urandom(size))
+    return path
+
+
+def read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+async def wait_drained(queue: UploadQueue, timeout: float):
+    deadline = time.monotonic() + timeout
+    while await asyncio.to_thread(queue.pending_count):
+        assert time.monotonic() < deadline, "uploads did not drain"
+        await asyncio.sleep(0.05)
+
+
+async def check_upload_and_retry(fake: FakeMinIO, directory: str, small_files: int):
+    uploader = new_uploader(fake, os.path.join(directory, "queue.db"))
+    await uploader.start()
+
+    large = write_file(directory, "large.seg", 2 * PART_SIZE + 1234)
+    smalls = [write_file(directory, f"small-{i}.idx", 4096 + i) for i in range(small_files)]
+    fake.fail_writes = 3
+
+    started = time.monotonic()
+    await uploader.submit(large, "recordings/check/large.seg")
+    for path in smalls:
+        await uploader.submit(path, f"recordings/check/{os.path.basename(path)}")
+    await wait_drained(uploader.queue, timeout=30)
+    elapsed = time.monotonic() - started
+    await uploader.stop()
+
+    assert fake.objects[(BUCKET, "recordings/check/large.seg")] == read(large), "large object differs"
+    bundled = {}
+    for (bucket, name), data in fake.objects.items():
+        if name.startswith("batches/"):
+            with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+                for member in tar.getmembers():
+                    bundled[member.name] = tar.extractfile(member).read()
+    for path in smalls:
+        assert bundled.get(f"recordings/check/{os.path.basename(path)}") == read(path), f"{path} not bundled"
+
+    print(f"upload + retry     OK  1 multipart + {small_files} bundled files in {elapsed:.2f} s, "
+          f"{fake.failed_writes} injected failures retried, queue empty")
+
+
+async def check_stop_waits(fake: FakeMinIO, directory: str):
+    queue_path = os.path.join(directory, "queue-stop.db")
+    uploader = new_uploader(fake, queue_path)
+    await uploader.start()
+
+    fake.latency = 1.0
+    path = write_file(directory, "late.seg", 2 * 1024 * 1024)
+    await uploader.submit(path, "recordings/check/late.seg")
+    while not uploader._in_flight:
+        await asyncio.sleep(0.01)
+    await uploader.stop()
+    fake.latency = 0.0
+
+    assert (BUCKET, "recordings/check/late.seg") in fake.objects, "in-flight upload did not finish"
+    pending = await asyncio.to_thread(UploadQueue(queue_path).pending_count)
+    assert pending == 0, f"{pending} upload(s) left queued after stop; they would be uploaded again"
+    print("stop during upload OK  in-flight upload finished and was marked done")
+
+
+async def main(small_files: int):
+    fake = FakeMinIO(port=0)
+    fake.start()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            await check_upload_and_retry(fake, directory, small_files)
+            await check_stop_waits(fake, directory)
+    finally:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--small-files", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.small_files))
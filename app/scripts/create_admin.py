@@ -6,6 +6,8 @@ from passlib.context import CryptContext
 
 from app.core.setting import settings
 from app.modules.user.model import User, Base
+from app.core.kafka.outbox import OutboxEvent  # noqa: F401  (creates kafka_outbox with the other tables)
+from app.modules.auth.security import RevokedToken  # noqa: F401  (creates revoked_tokens as well)
 from app.utils.hasher import hash_password
 
 # Password hasher
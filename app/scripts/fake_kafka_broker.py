@@ -0,0 +1,190 @@
+"""
+Single-node Kafka broker stand-in for local benchmarks and offline development.
+
+Speaks just enough of the Kafka wire protocol for aiokafka producers
+(ApiVersions, Metadata, Produce and InitProducerId for idempotent producers;
+advertised as broker 2.1 so every compression codec is allowed), acknowledges
+every batch after an optional simulated round-trip latency and counts the
+records it receives. Like a real broker it drops batches an idempotent
+producer resends (same producer id and sequence). Nothing is persisted and
+there is no Fetch support, so consumers cannot attach.
+
+Usage:
+    python -m app.scripts.fake_kafka_broker --port 9096 --latency-ms 2
+"""
+import argparse
+import asyncio
+import logging
+import struct
+import time
+from collections import Counter
+from typing import List, Optional
+
+from aiokafka.protocol.admin import ApiVersionResponse_v0
+from aiokafka.protocol.metadata import MetadataRequest, MetadataResponse
+from aiokafka.protocol.produce import ProduceRequest, ProduceResponse
+from aiokafka.protocol.transaction import InitProducerIdResponse_v0
+from aiokafka.record.memory_records import MemoryRecords
+
+logger = logging.getLogger(__name__)
+
+API_PRODUCE, API_FETCH, API_METADATA, API_VERSIONS, API_INIT_PRODUCER_ID = 0, 1, 3, 18, 22
+# Fetch v10 makes aiokafka settle on broker version 2.1 (Produce v7, zstd allowed)
+SUPPORTED_APIS = [(API_PRODUCE, 0, 7), (API_FETCH, 0, 10), (API_METADATA, 0, 1), (API_VERSIONS, 0, 0),
+                  (API_INIT_PRODUCER_ID, 0, 0)]
+NODE_ID = 0
+
+
+class FakeKafkaBroker:
+    def __init__(self, host: str = "127.0.0.1", port: int = 9096, partitions: int = 3,
+                 latency: float = 0.0, keep_records: bool = False):
+        self.host = host
+        self.port = port
+        self.partitions = partitions
+        self.latency = latency
+        self.keep_records = keep_records
+
+        self.records = Counter()
+        self.requests = Counter()
+        # (topic, key, value, headers) of every record, when keep_records is set
+        self.received: List[tuple] = []
+        self._offsets = Counter()
+        self._next_producer_id = 1000
+        # (producer_id, topic, partition) -> next expected sequence, for idempotent producers
+        self._sequences = {}
+        self.duplicate_batches = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers = set()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        if not self.port:
+            self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Fake Kafka broker listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        """Stop listening and drop every client connection (simulates the broker going away)."""
+        if self._server:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    @property
+    def bootstrap(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._writers.add(writer)
+        try:
+            while True:
+                size, = struct.unpack(">i", await reader.readexactly(4))
+                payload = await reader.readexactly(size)
+                response = await self._dispatch(payload)
+                if response is not None:
+                    writer.write(struct.pack(">i", len(response)) + response)
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _dispatch(self, payload: bytes) -> Optional[bytes]:
+        api_key, api_version, correlation_id = struct.unpack_from(">hhi", payload)
+        client_id_len, = struct.unpack_from(">h", payload, 8)
+        body = payload[10 + max(client_id_len, 0):]
+        self.requests[api_key] += 1
+
+        if api_key == API_VERSIONS:
+            response = ApiVersionResponse_v0(0, SUPPORTED_APIS)
+        elif api_key == API_INIT_PRODUCER_ID:
+            self._next_producer_id += 1
+            response = InitProducerIdResponse_v0(0, 0, self._next_producer_id, 0)
+        elif api_key == API_METADATA:
+            response = self._metadata(api_version, MetadataRequest[api_version].decode(body))
+        elif api_key == API_PRODUCE:
+            request = ProduceRequest[api_version].decode(body)
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            response = self._produce(api_version, request)
+            if request.required_acks == 0:
+                return None
+        else:
+            logger.warning(f"Unsupported Kafka API {api_key} v{api_version}")
+            return None
+        return struct.pack(">i", correlation_id) + response.encode()
+
+    def _metadata(self, version: int, request):
+        topics = request.topics or list({topic for topic, _ in self._offsets})
+        partitions = [(0, p, NODE_ID, [NODE_ID], [NODE_ID]) for p in range(self.partitions)]
+        if version == 0:
+            return MetadataResponse[0]([(NODE_ID, self.host, self.port)],
+                                       [(0, topic, partitions) for topic in topics])
+        return MetadataResponse[1]([(NODE_ID, self.host, self.port, None)], NODE_ID,
+                                   [(0, topic, False, partitions) for topic in topics])
+
+    def _produce(self, version: int, request):
+        results = []
+        now_ms = int(time.time() * 1000)
+        for topic, partitions in request.topics:
+            partition_results = []
+            for partition, data in partitions:
+                base_offset = self._offsets[(topic, partition)]
+                count = self._count(topic, partition, data)
+                self._offsets[(topic, partition)] += count
+                self.records[topic] += count
+                if version >= 5:
+                    partition_results.append((partition, 0, base_offset, now_ms, 0))
+                elif version >= 2:
+                    partition_results.append((partition, 0, base_offset, now_ms))
+                else:
+                    partition_results.append((partition, 0, base_offset))
+            results.append((topic, partition_results))
+        if version == 0:
+            return ProduceResponse[0](results)
+        return ProduceResponse[version](results, 0)
+
+    def _count(self, topic: str, partition: int, data: bytes) -> int:
+        count = 0
+        records = MemoryRecords(data)
+        while records.has_next():
+            batch = records.next_batch()
+            producer_id = getattr(batch, "producer_id", -1)
+            if producer_id >= 0:
+                key = (producer_id, topic, partition)
+                if batch.base_sequence < self._sequences.get(key, 0):
+                    self.duplicate_batches += 1
+                    continue
+                self._sequences[key] = batch.base_sequence + batch.next_offset - batch.base_offset
+            for record in batch:
+                count += 1
+                if self.keep_records:
+                    self.received.append((topic, record.key, record.value, list(record.headers)))
+        return count
+
+
+async def serve(host: str, port: int, partitions: int, latency_ms: float):
+    broker = FakeKafkaBroker(host, port, partitions, latency_ms / 1000)
+    await broker.start()
+    try:
+        while True:
+            await asyncio.sleep(10)
+            logger.info(f"records received: {dict(broker.records)}")
+    finally:
+        await broker.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9096)
+    parser.add_argument("--partitions", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.partitions, args.latency_ms))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,198 @@
+"""
+Single-node S3 / MinIO stand-in for local checks and offline development.
+
+Serves just enough of the S3 API for the minio client used by the app:
+bucket exists / create / location, PUT object, multipart uploads (initiate,
+upload part, complete, abort) and GET object. Objects are kept in memory and
+request signatures are not verified. Object writes can be delayed
+(latency) and the next N of them can be failed with a 400 RequestTimeout,
+which the minio client does not retry itself, to exercise the uploader's
+retries.
+
+Usage:
+    python -m app.scripts.fake_minio --port 9000 --latency-ms 5
+"""
+import argparse
+import logging
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+logger = logging.getLogger(__name__)
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>'
+S3_NAMESPACE = "http://s3.amazonaws.com/doc/2006-03-01/"
+
+
+class FakeMinIO:
+    def __init__(self, host: str = "127.0.0.1", port: int = 9000, latency: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        # Object writes (PUT object / upload part) still to be failed
+        self.fail_writes = 0
+
+        self.buckets = set()
+        self.objects: Dict[Tuple[str, str], bytes] = {}
+        self.requests = Counter()
+        self.failed_writes = 0
+        self._uploads: Dict[str, Dict[int, bytes]] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-minio", daemon=True)
+        self._thread.start()
+        logger.info(f"Fake MinIO listening on {self.endpoint}")
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _take_failure(self) -> bool:
+        with self._lock:
+            if self.fail_writes > 0:
+                self.fail_writes -= 1
+                self.failed_writes += 1
+                return True
+            return False
+
+    def _handler(self):
+        store = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+            def _target(self):
+                url = urlsplit(self.path)
+                bucket, _, key = url.path.lstrip("/").partition("/")
+                return unquote(bucket), unquote(key), parse_qs(url.query, keep_blank_values=True)
+
+            def _body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+            def _reply(self, status: int, body: bytes = b"", headers: Optional[dict] = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def _xml(self, status: int, xml: str):
+                self._reply(status, (XML_HEADER + xml).encode(), {"Content-Type": "application/xml"})
+
+            def _error(self, status: int, code: str, message: str):
+                resource = urlsplit(self.path).path
+                self._xml(status, f"<Error><Code>{code}</Code><Message>{message}</Message>"
+                                  f"<Resource>{resource}</Resource><RequestId>fake</RequestId></Error>")
+
+            def do_HEAD(self):
+                bucket, key, _ = self._target()
+                store.requests["HEAD"] += 1
+                if key:
+                    data = store.objects.get((bucket, key))
+                    if data is None:
+                        return self._reply(404)
+                    return self._reply(200, headers={"Content-Length": str(len(data)), "ETag": '"fake"'})
+                self._reply(200 if bucket in store.buckets else 404)
+
+            def do_GET(self):
+                bucket, key, query = self._target()
+                store.requests["GET"] += 1
+                if not key and "location" in query:
+                    return self._xml(200, f'<LocationConstraint xmlns="{S3_NAMESPACE}"></LocationConstraint>')
+                data = store.objects.get((bucket, key))
+                if data is None:
+                    return self._error(404, "NoSuchKey", "The specified key does not exist.")
+                self._reply(200, data, {"Content-Type": "application/octet-stream"})
+
+            def do_PUT(self):
+                bucket, key, query = self._target()
+                body = self._body()
+                store.requests["PUT"] += 1
+                if not key:
+                    store.buckets.add(bucket)
+                    return self._reply(200)
+                if bucket not in store.buckets:
+                    return self._error(404, "NoSuchBucket", "The specified bucket does not exist.")
+
+                if store.latency:
+                    time.sleep(store.latency)
+                if store._take_failure():
+                    return self._error(400, "RequestTimeout", "Injected failure.")
+
+                if "uploadId" in query:
+                    parts = store._uploads.get(query["uploadId"][0])
+                    if parts is None:
+                        return self._error(404, "NoSuchUpload", "The specified upload does not exist.")
+                    parts[int(query["partNumber"][0])] = body
+                else:
+                    store.objects[(bucket, key)] = body
+                self._reply(200, headers={"ETag": f'"{uuid.uuid4().hex}"'})
+
+            def do_POST(self):
+                bucket, key, query = self._target()
+                self._body()
+                store.requests["POST"] += 1
+                if "uploads" in query:
+                    upload_id = uuid.uuid4().hex
+                    store._uploads[upload_id] = {}
+                    return self._xml(200, f'<InitiateMultipartUploadResult xmlns="{S3_NAMESPACE}">'
+                                          f"<Bucket>{bucket}</Bucket><Key>{key}</Key>"
+                                          f"<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>")
+                if "uploadId" in query:
+                    parts = store._uploads.pop(query["uploadId"][0], None)
+                    if parts is None:
+                        return self._error(404, "NoSuchUpload", "The specified upload does not exist.")
+                    store.objects[(bucket, key)] = b"".join(parts[n] for n in sorted(parts))
+                    return self._xml(200, f'<CompleteMultipartUploadResult xmlns="{S3_NAMESPACE}">'
+                                          f"<Bucket>{bucket}</Bucket><Key>{key}</Key>"
+                                          f'<ETag>"{uuid.uuid4().hex}"</ETag></CompleteMultipartUploadResult>')
+                self._error(400, "InvalidRequest", "Unsupported POST.")
+
+            def do_DELETE(self):
+                bucket, key, query = self._target()
+                store.requests["DELETE"] += 1
+                if "uploadId" in query:
+                    store._uploads.pop(query["uploadId"][0], None)
+                else:
+                    store.objects.pop((bucket, key), None)
+                self._reply(204)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    server = FakeMinIO(args.host, args.port, args.latency_ms / 1000)
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
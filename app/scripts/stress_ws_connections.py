@@ -0,0 +1,80 @@
+"""
+Stress ConnectionManager bookkeeping by churning many WebSocket connections.
+
+Connects N sockets spread over a pool of users, disconnects them in random
+order (plus some duplicate disconnects), and checks the indexes stay consistent.
+
+Usage:
+    python -m app.scripts.stress_ws_connections --connections 10000 --users 500
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from app.initialize.websocket import ConnectionManager
+
+
+class NullWebSocket:
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        pass
+
+    async def send_bytes(self, data: bytes):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def check_consistent(manager: ConnectionManager):
+    indexed = sum(len(ws_set) for ws_set in manager.connections.values())
+    assert indexed == len(manager.clients) == manager.count_all_connections(), (
+        indexed, len(manager.clients), manager.count_all_connections()
+    )
+    for ws, client in manager.clients.items():
+        assert ws in manager.connections[client.user_id]
+
+
+async def run(connections: int, users: int, rounds: int):
+    manager = ConnectionManager()
+    sockets = [NullWebSocket() for _ in range(connections)]
+
+    for round_no in range(1, rounds + 1):
+        start = time.perf_counter()
+        for i, ws in enumerate(sockets):
+            await manager.connect(ws, f"user-{i % users}")
+        connect_elapsed = time.perf_counter() - start
+        check_consistent(manager)
+        assert manager.count_all_connections() == connections
+
+        random.shuffle(sockets)
+        start = time.perf_counter()
+        for i, ws in enumerate(sockets):
+            manager.disconnect(ws)
+            if i % 10 == 0:
+                manager.disconnect(ws)  # duplicate disconnects must be no-ops
+            if i % 1000 == 0:
+                manager.count_all_connections()
+        disconnect_elapsed = time.perf_counter() - start
+        await asyncio.sleep(0)  # let cancelled writer tasks unwind
+        check_consistent(manager)
+        assert manager.count_all_connections() == 0
+        assert not manager.connections and not manager.clients
+
+        print(f"round {round_no}: connect {connections / connect_elapsed:>10.0f} ops/sec, "
+              f"disconnect {connections / disconnect_elapsed:>10.0f} ops/sec")
+
+    print("OK: indexes consistent after churn")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Churn connections through ConnectionManager")
+    parser.add_argument("--connections", type=int, default=10000, help="Connections per round")
+    parser.add_argument("--users", type=int, default=500, help="Distinct user ids")
+    parser.add_argument("--rounds", type=int, default=3, help="Connect/disconnect rounds")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.connections, args.users, args.rounds))
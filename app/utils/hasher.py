@@ -1,5 +1,13 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
 from passlib.context import CryptContext
 
+from app.core.app_status import AppStatus
+from app.core.setting import settings
+from app.utils.response import error_exception_handler
+
 pwd_context_12 = CryptContext(schemes=["bcrypt"], deprecated="auto")
 pwd_context_04 = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4, deprecated="auto")
 
@@ -16,6 +24,57 @@ def verify_password(password: str, hashed_password: str):
     return pwd_context_12.verify(password, hashed_password)
 
 
+class PasswordHasherPool:
+    """
+    Runs bcrypt in a small process pool so hashing never blocks the event loop
+    (which also delivers frames). At most `workers` jobs are in the pool at a
+    time; up to `max_pending` more wait their turn, anything beyond that is
+    rejected with TOO_MANY_REQUESTS instead of growing an unbounded backlog.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+
+    def _ensure_started(self):
+        if self._executor is None:
+            # spawn: forking a process that runs grpc/asyncio threads is not safe
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            self._slots = asyncio.Semaphore(self.workers)
+
+    async def run(self, func, *args):
+        self._ensure_started()
+        if self.pending >= self.workers + self.max_pending:
+            raise error_exception_handler(AppStatus.TOO_MANY_REQUESTS, headers={"Retry-After": "1"})
+
+        self.pending += 1
+        try:
+            async with self._slots:
+                return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher_pool = PasswordHasherPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
+
+async def hash_password_async(password: str):
+    return await password_hasher_pool.run(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed_password: str):
+    return await password_hasher_pool.run(verify_password, password, hashed_password)
+
+
 if __name__ == '__main__':
     print(hash_password("123123"))
     hash_pass = hash_04_password("123123")